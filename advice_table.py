@@ -0,0 +1,178 @@
+#precomputed investment advice for every (age band, risk tolerance, tax bracket) combination
+#build it offline once, then serve Investa's advice from it without a model call
+#usage: python advice_table.py [--output advice_table.json] [--concurrency 8]
+#serve it with FINLEY_ADVICE_TABLE=<path>
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from portfolio import RISK_LEVELS
+from tax_engine import bracket_labels
+
+TABLE_VERSION = 1
+DEFAULT_TABLE_PATH = "advice_table.json"
+MIN_AGE, MAX_AGE = 18, 100
+
+# Five-year bands, with the youngest band covering 18-24 and the oldest running to MAX_AGE
+AGE_BANDS = ((MIN_AGE, 24),) + tuple((lower, lower + 4) for lower in range(25, 95, 5)) + ((95, MAX_AGE),)
+
+
+def investment_prompt(age, risk_tolerance, tax_bracket):
+    """Investa's prompt; `age` is a number or a band label such as '30-34'."""
+    return f"Act as an expert financial advisor in India. Give me a holistic investment plan for a {age}-year-old with a '{risk_tolerance}' risk tolerance, who is in the {tax_bracket} tax bracket. Focus on actionable advice, specific investment types (like PPF, ELSS, Index Funds), and explain the rationale, especially how the tax bracket influences the choices."
+
+
+def band_label(band):
+    return f"{band[0]}-{band[1]}"
+
+
+def tax_brackets():
+    """Every bracket label any tax year can produce, plus the placeholder used before Taxwell has run.
+
+    Read from the tax rules when called rather than at import, so importing
+    this module (and app2) never loads or validates them.
+    """
+    return bracket_labels() + ("Unknown",)
+
+
+def table_keys():
+    """Every (age band, risk, bracket) combination the table covers."""
+    return [(band, risk, bracket) for band in AGE_BANDS for risk in RISK_LEVELS for bracket in tax_brackets()]
+
+
+class AdviceTable:
+    """An in-memory advice table with constant-time lookups by profile."""
+
+    def __init__(self, entries, model=None):
+        self.model = model
+        # Age -> band index, so a lookup is two list/dict accesses regardless of table size
+        self._band_of_age = [None] * (MAX_AGE + 1)
+        for index, (lower, upper) in enumerate(AGE_BANDS):
+            for age in range(lower, upper + 1):
+                self._band_of_age[age] = index
+        labels = {band_label(band): index for index, band in enumerate(AGE_BANDS)}
+        self._advice = {}
+        for key, advice in entries.items():
+            band, risk, bracket = key.split("|", 2)
+            if band in labels:
+                self._advice[(labels[band], risk, bracket)] = advice
+
+    def __len__(self):
+        return len(self._advice)
+
+    def lookup(self, age, risk_tolerance, tax_bracket):
+        """Returns the precomputed advice for a profile, or None if the table does not cover it."""
+        if not isinstance(age, int) or not 0 <= age <= MAX_AGE:
+            return None
+        band = self._band_of_age[age]
+        if band is None:
+            return None
+        return self._advice.get((band, risk_tolerance, tax_bracket))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != TABLE_VERSION:
+            raise ValueError(f"Unsupported advice table version {data.get('version')!r} in {path}")
+        return cls(data["entries"], model=data.get("model"))
+
+
+def build_table(generate, concurrency=8, progress=None):
+    """Generates advice for every table key with `generate(prompt)` -> text.
+
+    Returns (entries, failures); failed combinations are left out, so the live
+    model keeps answering for them.
+    """
+    keys = table_keys()
+    entries, failures = {}, {}
+    lock = threading.Lock()
+
+    def work(key):
+        band, risk, bracket = key
+        label = f"{band_label(band)}|{risk}|{bracket}"
+        try:
+            text, error = generate(investment_prompt(band_label(band), risk, bracket)), None
+        except Exception as e:
+            text, error = None, f"{type(e).__name__}: {e}"
+        with lock:
+            if error is None:
+                entries[label] = text
+            else:
+                failures[label] = error
+            if progress is not None:
+                progress(len(entries) + len(failures), len(keys))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(work, keys))
+    return dict(sorted(entries.items())), failures
+
+
+_table = None
+_table_configured = False
+_table_lock = threading.Lock()
+
+
+def get_advice_table():
+    """Returns the process-wide advice table (None when off), loaded from FINLEY_ADVICE_TABLE on first use."""
+    global _table, _table_configured
+    if not _table_configured:
+        with _table_lock:
+            if not _table_configured:
+                path = os.getenv("FINLEY_ADVICE_TABLE")
+                _table = AdviceTable.load(path) if path else None
+                _table_configured = True
+    return _table
+
+
+def set_advice_table(table):
+    """Replaces the process-wide advice table (None turns lookups off) and returns the previous one."""
+    global _table, _table_configured
+    with _table_lock:
+        previous, _table = _table, table
+        _table_configured = True
+    return previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute Investa's advice for every age band, risk level and tax bracket.")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--concurrency", type=int, default=8, help="model calls in flight at once")
+    args = parser.parse_args(argv)
+
+    from app2 import MODEL_NAME
+    from scheduler import get_scheduler
+
+    # Calls go through the scheduler directly so that errors are reported instead of stored as advice
+    scheduler = get_scheduler(MODEL_NAME)
+    started = time.perf_counter()
+    entries, failures = build_table(
+        lambda prompt: scheduler.generate(prompt).text,
+        concurrency=args.concurrency,
+        progress=lambda done, total: print(f"\r{done}/{total} combinations", end="", file=sys.stderr),
+    )
+    print(file=sys.stderr)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": TABLE_VERSION,
+            "model": MODEL_NAME,
+            "generated_at": time.time(),
+            "age_bands": [list(band) for band in AGE_BANDS],
+            "entries": entries,
+        }, f, ensure_ascii=False, indent=1)
+    print(json.dumps({
+        "output": args.output,
+        "entries": len(entries),
+        "failures": failures,
+        "elapsed_s": time.perf_counter() - started,
+    }, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
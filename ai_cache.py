@@ -0,0 +1,186 @@
+#content-addressed cache for generative model responses
+#two tiers: an in-memory LRU in front of an on-disk SQLite store, both with TTL and size limits
+#configured with FINLEY_CACHE=0 (disable), FINLEY_CACHE_PATH=<sqlite file or ':memory:'>, FINLEY_CACHE_TTL=<seconds>
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "finley", "responses.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_ENTRIES = 10000
+
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so cosmetic differences in a prompt share one cache entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model_name, prompt):
+    """Returns the content address of a (model, prompt) pair."""
+    payload = f"{model_name}\0{normalize_prompt(prompt)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """A two-tier (memory LRU + SQLite) cache of model responses.
+
+    path=None keeps the cache purely in memory. All methods are thread-safe.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 max_disk_entries=DEFAULT_DISK_ENTRIES, clock=time.time):
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (created, response)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        self._db = None
+        if path is not None:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key, created, response):
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def get(self, model_name, prompt):
+        """Returns the cached response for a prompt, or None on a miss."""
+        key = cache_key(model_name, prompt)
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT created, response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    created, response = row
+                    if not self._expired(created, now):
+                        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        self._remember(key, created, response)
+                        self.disk_hits += 1
+                        return response
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self.misses += 1
+            return None
+
+    def put(self, model_name, prompt, response):
+        """Stores a response in both tiers, evicting the least recently used entries past the limits."""
+        key = cache_key(model_name, prompt)
+        now = self._clock()
+        with self._lock:
+            self._remember(key, now, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, response, now, now),
+                )
+                self._evict_disk(now)
+
+    def _evict_disk(self, now):
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self.disk_evictions += excess
+
+    def get_or_generate(self, model_name, prompt, generate):
+        """Returns the cached response, calling generate(prompt) and caching its result on a miss."""
+        response = self.get(model_name, prompt)
+        if response is None:
+            response = generate(prompt)
+            self.put(model_name, prompt, response)
+        return response
+
+    def clear(self):
+        """Drops every cached response."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Returns hit/miss counters and tier sizes."""
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self._db is not None else 0
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk_evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide cache configured from the environment, or None when disabled."""
+    global _cache, _cache_configured
+    if not _cache_configured:
+        # Agents call the model from worker threads, so only one of them may build the cache
+        with _cache_lock:
+            if not _cache_configured:
+                if os.getenv("FINLEY_CACHE", "1") != "0":
+                    ttl = float(os.getenv("FINLEY_CACHE_TTL", DEFAULT_TTL))
+                    _cache = ResponseCache(path=os.getenv("FINLEY_CACHE_PATH", DEFAULT_CACHE_PATH), ttl=ttl)
+                _cache_configured = True
+    return _cache
+
+
+def set_response_cache(cache):
+    """Replaces the process-wide cache (None disables caching) and returns the previous one."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        previous, _cache = _cache, cache
+        _cache_configured = True
+    return previous
@@ -1,36 +1,24 @@
 #this is hierarchical financial assistant app not A2A protocol
 #the agents are not aware of each other, they are just classes
-import time
-import textwrap
-
-# ANSI color codes for better terminal output
-class colors:
-    BLUE = '\033[94m'
-    GREEN = '\033[92m'
-    PURPLE = '\033[95m'
-    RED = '\033[91m'
-    YELLOW = '\033[93m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
+from renderers import colors, get_renderer
+from tax_engine import compute_tax, get_tax_rules, NEW_REGIME
+from portfolio import recommend_allocation
+from regime_solver import breakeven_deductions
 
 def print_agent_message(agent_name, message, color):
     """Prints a formatted message from an agent."""
-    print(f"\n{color}{colors.BOLD}{agent_name}:{colors.ENDC}{color}")
-    # Wrap text for better readability in terminal
-    wrapped_message = textwrap.fill(message, width=80)
-    print(wrapped_message + colors.ENDC)
-    time.sleep(1.5)
+    get_renderer().message(agent_name, message, color)
 
 def get_user_input(prompt):
     """Gets input from the user."""
-    return input(f"{colors.YELLOW}> {prompt}{colors.ENDC}")
+    return get_renderer().prompt(prompt)
 
 class Taxwell:
     """The Tax Specialist Agent"""
 
     def calculate_tax(self):
         """Guides the user through tax calculation."""
-        print_agent_message("Taxwell", "I can help with that. To calculate your tax liability for FY 2024-25, I need some details.", colors.GREEN)
+        print_agent_message("Taxwell", f"I can help with that. To calculate your tax liability for {get_tax_rules().year}, I need some details.", colors.GREEN)
         
         # Get Annual Income
         while True:
@@ -59,37 +47,12 @@ class Taxwell:
         print_agent_message("Taxwell", f"Thanks. Calculating tax for an income of ₹{income:,.2f} and deductions of ₹{deductions:,.2f}...", colors.GREEN)
         
         # --- Tax Calculation Logic ---
-        # Old Regime
-        taxable_old = max(0, income - deductions)
-        tax_old = 0
-        if taxable_old > 1000000:
-            tax_old = 112500 + (taxable_old - 1000000) * 0.30
-        elif taxable_old > 500000:
-            tax_old = 12500 + (taxable_old - 500000) * 0.20
-        elif taxable_old > 250000:
-            tax_old = (taxable_old - 250000) * 0.05
-        
-        old_regime_tax = round(tax_old * 1.04)
-        if taxable_old <= 500000: old_regime_tax = 0  # Rebate u/s 87A
-
-        # New Regime
-        taxable_new = income
-        tax_new = 0
-        if taxable_new > 1500000:
-            tax_new = 150000 + (taxable_new - 1500000) * 0.30
-        elif taxable_new > 1200000:
-            tax_new = 90000 + (taxable_new - 1200000) * 0.20
-        elif taxable_new > 900000:
-            tax_new = 45000 + (taxable_new - 900000) * 0.15
-        elif taxable_new > 600000:
-            tax_new = 15000 + (taxable_new - 600000) * 0.10
-        elif taxable_new > 300000:
-            tax_new = (taxable_new - 300000) * 0.05
-            
-        new_regime_tax = round(tax_new * 1.04)
-        if taxable_new <= 700000: new_regime_tax = 0 # Rebate u/s 87A
+        tax = compute_tax(income, deductions)
+        taxable_old, old_regime_tax = tax["taxable_old"], tax["old_regime_tax"]
+        taxable_new, new_regime_tax = tax["taxable_new"], tax["new_regime_tax"]
 
-        recommendation = "The New Regime seems more beneficial." if new_regime_tax < old_regime_tax else "The Old Regime seems more beneficial."
+        recommendation = "The New Regime seems more beneficial." if tax["recommended_regime"] == NEW_REGIME else "The Old Regime seems more beneficial."
+        breakeven = float(breakeven_deductions([income])[0])
 
         result_text = f"""
 Here's your tax summary:
@@ -103,6 +66,7 @@ Here's your tax summary:
 - Tax Liability:  ₹{new_regime_tax:,.2f}
 
 {colors.BOLD}Recommendation:{colors.ENDC} {recommendation}
+The Old Regime wins at this income with deductions of ₹{breakeven:,.2f} or more.
         """
         print_agent_message("Taxwell", result_text, colors.GREEN)
 
@@ -143,8 +107,8 @@ class Investa:
 - 20% in Hybrid Funds: Balanced advantage funds that mix equity and debt.
 - 20% in Large-Cap Equity: NIFTY 50 Index Funds or large-cap mutual funds for steady growth."""
         elif risk_choice == 'medium':
-            equity = min(80, 100 - age)
-            debt = 100 - equity
+            allocation = recommend_allocation(age, risk_choice)
+            equity, debt = allocation["equity"], allocation["debt"]
             advice += f"""- {equity}% in Equity: A mix of Large-Cap Index Funds ({round(equity * 0.6)}%), Mid-Cap Funds ({round(equity * 0.3)}%), and a small allocation to Small-Cap Funds ({round(equity * 0.1)}%).
 - {debt}% in Debt: A mix of PPF, and Corporate Bond Funds for stability."""
         else: # high risk
@@ -156,45 +120,50 @@ class Investa:
         print_agent_message("Investa", advice, colors.PURPLE)
 
 
-class Filer:
-    """The ITR Filing Assistant Agent"""
-
-    def give_guidance(self):
-        """Provides guidance on ITR forms."""
-        print_agent_message("Filer", "I can guide you through the ITR filing process.", colors.RED)
-        
-        while True:
-            print_agent_message("Filer", "Which ITR form are you planning to file? If unsure, type 'unsure'.", colors.RED)
-            choice = get_user_input("Options: 'ITR-1', 'ITR-2', 'unsure': ").lower()
-
-            if choice == 'itr-1':
-                guide_text = """Great, let's go through ITR-1 (Sahaj). Here are the key sections:
+ITR_GUIDES = {
+    'itr-1': """Great, let's go through ITR-1 (Sahaj). Here are the key sections:
 
 1.  Part A - General Information: Your PAN, Aadhaar, address, etc. (Mostly pre-filled).
 2.  Part B - Gross Total Income: Enter salary (from Form 16), house property income, etc.
 3.  Part C - Deductions: Fill in your deductions under Chapter VI-A (80C, 80D).
 4.  Part D - Computation of Tax Payable: The system calculates your tax.
 5.  Part E - Other Information: Details of all your bank accounts.
-Remember to verify all pre-filled data before submitting!"""
-                print_agent_message("Filer", guide_text, colors.RED)
-                break
-            elif choice == 'itr-2':
-                guide_text = """ITR-2 is for individuals without business income but who may have capital gains.
+Remember to verify all pre-filled data before submitting!""",
+    'itr-2': """ITR-2 is for individuals without business income but who may have capital gains.
 In addition to ITR-1 sections, you'll have specific schedules for:
 - Schedule CG: For Capital Gains from selling stocks, property, etc.
 - Schedule FA: For reporting foreign assets and income.
-It's crucial to have your broker statements and property sale documents handy."""
-                print_agent_message("Filer", guide_text, colors.RED)
-                break
-            elif choice == 'unsure':
-                info_text = """No problem. 
+It's crucial to have your broker statements and property sale documents handy.""",
+    'unsure': """No problem. 
 - ITR-1 (Sahaj) is for resident individuals with income up to ₹50 lakh from salary, one house property, and other sources.
 - ITR-2 is for those who don't have business income but might have capital gains or foreign assets.
-Which one sounds more like your situation?"""
-                print_agent_message("Filer", info_text, colors.RED)
-                # This loop will then repeat, allowing them to choose ITR-1 or ITR-2
-            else:
+Which one sounds more like your situation?""",
+}
+
+
+class Filer:
+    """The ITR Filing Assistant Agent"""
+
+    def guidance(self, choice):
+        """Returns the guidance text for an ITR form choice, or None if the choice is not recognised."""
+        return ITR_GUIDES.get(choice.strip().lower())
+
+    def give_guidance(self):
+        """Provides guidance on ITR forms."""
+        print_agent_message("Filer", "I can guide you through the ITR filing process.", colors.RED)
+        
+        while True:
+            print_agent_message("Filer", "Which ITR form are you planning to file? If unsure, type 'unsure'.", colors.RED)
+            choice = get_user_input("Options: 'ITR-1', 'ITR-2', 'unsure': ").strip().lower()
+
+            guide_text = self.guidance(choice)
+            if guide_text is None:
                 print_agent_message("Filer", "Invalid option. Please choose from the list.", colors.RED)
+                continue
+            print_agent_message("Filer", guide_text, colors.RED)
+            # 'unsure' repeats the loop, allowing them to choose ITR-1 or ITR-2
+            if choice != 'unsure':
+                break
 
 
 class Finley:
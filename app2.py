@@ -1,87 +1,303 @@
-import time
-import textwrap
+import argparse
+import asyncio
+import contextvars
 import os
-import google.generativeai as genai
-
-# ANSI color codes for better terminal output
-class colors:
-    BLUE = '\033[94m'
-    GREEN = '\033[92m'
-    PURPLE = '\033[95m'
-    RED = '\033[91m'
-    YELLOW = '\033[93m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-
-def print_agent_message(agent_name, message, color, typing_delay=1.5):
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from advice_table import get_advice_table, investment_prompt
+from ai_cache import get_response_cache
+from model_pool import APIKeyError
+from renderers import colors, get_renderer
+from scheduler import SchedulerBusy, get_scheduler, is_retryable
+from tax_engine import compute_tax
+from tracing import span
+
+def print_agent_message(agent_name, message, color, typing_delay=None):
     """Prints a formatted message from an agent."""
-    print(f"\n{color}{colors.BOLD}{agent_name}:{colors.ENDC}{color}")
-    wrapped_message = textwrap.fill(message, width=80)
-    print(wrapped_message + colors.ENDC)
-    time.sleep(typing_delay)
+    with span("render.message", agent=agent_name):
+        get_renderer().message(agent_name, message, color, typing_delay=typing_delay)
 
 def get_user_input(prompt):
     """Gets input from the user."""
-    return input(f"{colors.YELLOW}> {prompt}{colors.ENDC}")
+    with span("user.input"):
+        return get_renderer().prompt(prompt)
 
-def call_generative_ai(prompt):
-    """Makes a real API call to the Gemini model."""
-    print(f"\n{colors.BLUE}[Thinking... Contacting Generative AI...]{colors.ENDC}")
-    
-    # --- BEST PRACTICE: Get API Key from Environment Variable ---
-    # It's safer to store your key outside the code.
-    # Set it in your terminal before running: export GOOGLE_API_KEY="YOUR_API_KEY"
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        # A fallback for simplicity if the environment variable isn't set.
-        # WARNING: Do not commit your API key directly into the code in a real project.
-        api_key = "" 
-    
-    if api_key == "YOUR_API_KEY_HERE":
-        print(f"{colors.RED}ERROR: Please replace 'YOUR_API_KEY_HERE' with your actual Gemini API key.{colors.ENDC}")
-        return "I cannot connect to the AI service without a valid API key."
+MODEL_NAME = 'gemini-2.0-flash' # Or another suitable model
+BUSY_MESSAGE = "The AI service is busy right now. Please try again in a moment."
+
+def _cached_reply(prompt, trace):
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    cached = cache.get(MODEL_NAME, prompt)
+    trace.set(cache="hit" if cached is not None else "miss")
+    return cached
 
+
+def _generate_reply(prompt, trace):
+    """Calls the model; returns (text, problem) where problem is None on success, else a message for the user."""
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash') # Or another suitable model
-        response = model.generate_content(prompt)
-        
-        # Add a small delay to make the interaction feel natural
-        time.sleep(1.5) 
-        
-        return response.text
+        # The scheduler rate-limits, retries and merges calls onto the shared, once-configured model pool
+        response = get_scheduler(MODEL_NAME).generate(prompt)
+
+        # Only successful responses are cached; the fallback messages below never are
+        cache = get_response_cache()
+        if cache is not None:
+            cache.put(MODEL_NAME, prompt, response.text)
+        return response.text, None
 
+    except APIKeyError as e:
+        trace.set(error="APIKeyError")
+        return "I cannot connect to the AI service without a valid API key.", f"ERROR: {e}"
+    except SchedulerBusy as e:
+        trace.set(error="SchedulerBusy")
+        return BUSY_MESSAGE, f"The AI service queue is full: {e}"
     except Exception as e:
-        print(f"{colors.RED}An error occurred with the AI service: {e}{colors.ENDC}")
-        return "I'm sorry, I'm having trouble connecting to my knowledge base right now."
+        if is_retryable(e):
+            trace.set(error="RateLimited")
+            return BUSY_MESSAGE, f"The AI service is still rate limiting after retries: {e}"
+        trace.set(error=type(e).__name__)
+        return "I'm sorry, I'm having trouble connecting to my knowledge base right now.", f"An error occurred with the AI service: {e}"
+
+
+def call_generative_ai(prompt):
+    """Makes a real API call to the Gemini model, serving repeated prompts from the response cache."""
+    with span("model.call", model=MODEL_NAME) as trace:
+        cached = _cached_reply(prompt, trace)
+        if cached is not None:
+            return cached
+
+        renderer = get_renderer()
+        renderer.status("\n[Thinking... Contacting Generative AI...]", colors.BLUE)
+        text, problem = _generate_reply(prompt, trace)
+        if problem is not None:
+            renderer.status(problem, colors.RED)
+        else:
+            # Add a small delay to make the interaction feel natural (capped by the renderer)
+            renderer.pause(1.5)
+        return text
+
+
+def fetch_generative_ai(prompt):
+    """Quiet variant of call_generative_ai for worker threads: no status output and no pause.
+
+    Returns (text, problem); problem is None on success, otherwise a message
+    the caller shows when it renders the reply.
+    """
+    with span("model.call", model=MODEL_NAME) as trace:
+        cached = _cached_reply(prompt, trace)
+        if cached is not None:
+            return cached, None
+        return _generate_reply(prompt, trace)
+
 
+class ModelStream:
+    """A model response streamed on a background thread.
 
+    The call starts as soon as the stream is created, so several streams can
+    be in flight while the caller renders them one at a time. Iterating yields
+    text chunks; first_chunk_s and total_s record time to the first chunk and
+    to the end of the response, measured from creation. Advice that is
+    already known (`precomputed`) is served as a single chunk without a model call.
+    The producer thread never writes to the console; if the call fails,
+    `problem` holds a message for whoever renders the stream.
+    """
+    _END = object()
+
+    def __init__(self, prompt, precomputed=None):
+        self.prompt = prompt
+        self.problem = None
+        self.first_chunk_s = None
+        self.total_s = None
+        self._chunks = queue.Queue()
+        self._started = time.perf_counter()
+        if precomputed is not None:
+            self._put(precomputed)
+            self.total_s = self.first_chunk_s
+            self._chunks.put(self._END)
+            return
+        # Run the producer in a copy of the caller's context so its spans nest under the caller's
+        threading.Thread(target=contextvars.copy_context().run, args=(self._produce,), daemon=True).start()
+
+    def _put(self, text):
+        if self.first_chunk_s is None:
+            self.first_chunk_s = time.perf_counter() - self._started
+        self._chunks.put(text)
+
+    def _produce(self):
+        try:
+            cache = get_response_cache()
+            cached = cache.get(MODEL_NAME, self.prompt) if cache is not None else None
+            if cached is not None:
+                self._put(cached)
+                return
+            parts = []
+            for text in get_scheduler(MODEL_NAME).stream(self.prompt):
+                parts.append(text)
+                self._put(text)
+            if cache is not None:
+                cache.put(MODEL_NAME, self.prompt, "".join(parts))
+        except APIKeyError as e:
+            self.problem = f"ERROR: {e}"
+            self._put("I cannot connect to the AI service without a valid API key.")
+        except Exception as e:
+            if isinstance(e, SchedulerBusy) or is_retryable(e):
+                self.problem = f"The AI service is busy: {e}"
+                self._put(BUSY_MESSAGE)
+                return
+            self.problem = f"An error occurred with the AI service: {e}"
+            self._put("I'm sorry, I'm having trouble connecting to my knowledge base right now.")
+        finally:
+            self.total_s = time.perf_counter() - self._started
+            self._chunks.put(self._END)
+
+    def __iter__(self):
+        while True:
+            text = self._chunks.get()
+            if text is self._END:
+                return
+            yield text
+
+
+# Binary layout of a serialized FinancialContext (little-endian, 22 bytes plus any spelled-out labels):
+#   version, presence flags, income, deductions, age, risk code, bracket code, regime code
+_CONTEXT_FORMAT = struct.Struct("<BBddBBBB")
+_CONTEXT_VERSION = 1
+_HAS_INCOME, _HAS_DEDUCTIONS, _HAS_AGE, _HAS_RISK = 1, 2, 4, 8
+_RISK_CODES = ("low", "medium", "high")
+_BRACKET_CODES = ("Unknown", "5% or less", "15% or less", "20%", "25%", "30%")
+_REGIME_CODES = ("Unknown", "Old Regime", "New Regime")
+_SPELLED_OUT = 255  # label not in the code table; a length-prefixed UTF-8 string follows
+
+
+def _encode_label(value, codes):
+    if value in codes:
+        return codes.index(value), b""
+    raw = value.encode("utf-8")
+    if len(raw) > 254:
+        raise ValueError(f"Label too long to serialize: {value!r}")
+    return _SPELLED_OUT, bytes([len(raw)]) + raw
+
+
+@dataclass(slots=True)
 class FinancialContext:
     """A shared whiteboard for agents to read from and write to."""
-    def __init__(self):
-        self.income = None
-        self.deductions = None
-        self.age = None
-        self.risk_tolerance = None
-        self.tax_bracket = "Unknown"
-        self.recommended_regime = "Unknown"
+    income: Optional[float] = None
+    deductions: Optional[float] = None
+    age: Optional[int] = None
+    risk_tolerance: Optional[str] = None
+    tax_bracket: str = "Unknown"
+    recommended_regime: str = "Unknown"
+
+    def to_bytes(self):
+        """Serializes the context into its compact binary form."""
+        flags = ((self.income is not None) * _HAS_INCOME | (self.deductions is not None) * _HAS_DEDUCTIONS
+                 | (self.age is not None) * _HAS_AGE | (self.risk_tolerance is not None) * _HAS_RISK)
+        bracket_code, bracket_tail = _encode_label(self.tax_bracket, _BRACKET_CODES)
+        regime_code, regime_tail = _encode_label(self.recommended_regime, _REGIME_CODES)
+        head = _CONTEXT_FORMAT.pack(
+            _CONTEXT_VERSION, flags,
+            self.income or 0.0, self.deductions or 0.0, self.age or 0,
+            _RISK_CODES.index(self.risk_tolerance) if self.risk_tolerance is not None else 0,
+            bracket_code, regime_code,
+        )
+        return head + bracket_tail + regime_tail
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuilds a context serialized by to_bytes()."""
+        version, flags, income, deductions, age, risk, bracket_code, regime_code = _CONTEXT_FORMAT.unpack_from(data)
+        if version != _CONTEXT_VERSION:
+            raise ValueError(f"Unsupported FinancialContext format version {version}")
+        offset = _CONTEXT_FORMAT.size
+        labels = []
+        for code, codes in ((bracket_code, _BRACKET_CODES), (regime_code, _REGIME_CODES)):
+            if code == _SPELLED_OUT:
+                length = data[offset]
+                labels.append(bytes(data[offset + 1:offset + 1 + length]).decode("utf-8"))
+                offset += 1 + length
+            else:
+                labels.append(codes[code])
+        return cls(
+            income=income if flags & _HAS_INCOME else None,
+            deductions=deductions if flags & _HAS_DEDUCTIONS else None,
+            age=age if flags & _HAS_AGE else None,
+            risk_tolerance=_RISK_CODES[risk] if flags & _HAS_RISK else None,
+            tax_bracket=labels[0],
+            recommended_regime=labels[1],
+        )
 
 class Agent:
-    """Base class for all specialist agents."""
+    """Base class for all specialist agents.
+
+    `reads` and `writes` name the FinancialContext fields an agent consumes and
+    produces; Finley uses them to decide which agents can run concurrently.
+    """
+    reads = ()
+    writes = ()
+
     def __init__(self, name, color):
         self.name = name
         self.color = color
 
+    def prepare(self, context: FinancialContext):
+        """Collects missing inputs and runs local analysis, writing results to the context."""
+        raise NotImplementedError("Each agent must implement its own prepare method.")
+
+    def build_prompt(self, context: FinancialContext):
+        """Returns the prompt this agent sends to the generative model."""
+        raise NotImplementedError("Each agent must implement its own build_prompt method.")
+
+    def precomputed_advice(self, context: FinancialContext):
+        """Returns advice known without a model call (e.g. from a precomputed table), or None."""
+        return None
+
+    async def fetch_advice(self, context: FinancialContext):
+        """Fetches this agent's AI advice without blocking the event loop or writing to the console.
+
+        Returns (advice, problem); see fetch_generative_ai().
+        """
+        with span("agent.advise", agent=self.name) as trace:
+            advice = self.precomputed_advice(context)
+            trace.set(precomputed=advice is not None)
+            if advice is not None:
+                return advice, None
+            return await asyncio.to_thread(fetch_generative_ai, self.build_prompt(context))
+
+    async def advise(self, context: FinancialContext):
+        """Fetches this agent's AI advice without blocking the event loop; problems are reported from the loop's thread."""
+        advice, problem = await self.fetch_advice(context)
+        if problem is not None:
+            get_renderer().status(problem, colors.RED)
+        return advice
+
+    def stream_advice(self, context: FinancialContext):
+        """Starts streaming this agent's AI advice and returns the ModelStream."""
+        return ModelStream(self.build_prompt(context), precomputed=self.precomputed_advice(context))
+
     def process(self, context: FinancialContext):
         """The main method for an agent to perform its task."""
-        raise NotImplementedError("Each agent must implement its own process method.")
+        with span("agent.process", agent=self.name):
+            with span("agent.prepare", agent=self.name):
+                self.prepare(context)
+            advice = self.precomputed_advice(context)
+            if advice is None:
+                advice = call_generative_ai(self.build_prompt(context))
+            print_agent_message(self.name, advice, self.color)
 
 class Taxwell(Agent):
     """The Tax Specialist Agent. Reads income/deductions, writes tax info to context."""
+    reads = ("income", "deductions")
+    writes = ("recommended_regime", "tax_bracket")
+
     def __init__(self):
         super().__init__("Taxwell", colors.GREEN)
 
-    def process(self, context: FinancialContext):
+    def prepare(self, context: FinancialContext):
         print_agent_message(self.name, "I need to assess your tax situation to build your financial profile.", self.color)
         
         if context.income is None:
@@ -104,50 +320,35 @@ class Taxwell(Agent):
                 except ValueError:
                     print_agent_message(self.name, "That doesn't look like a valid number.", colors.RED)
 
-        # --- Perform Calculations ---
-        taxable_old = max(0, context.income - context.deductions)
-        tax_old = 0
-        if taxable_old > 1000000: tax_old = 112500 + (taxable_old - 1000000) * 0.30
-        elif taxable_old > 500000: tax_old = 12500 + (taxable_old - 500000) * 0.20
-        elif taxable_old > 250000: tax_old = (taxable_old - 250000) * 0.05
-        old_regime_tax = round(tax_old * 1.04)
-        if taxable_old <= 500000: old_regime_tax = 0
-
-        taxable_new = context.income
-        tax_new = 0
-        if taxable_new > 1500000: tax_new = 150000 + (taxable_new - 1500000) * 0.30
-        elif taxable_new > 1200000: tax_new = 90000 + (taxable_new - 1200000) * 0.20
-        elif taxable_new > 900000: tax_new = 45000 + (taxable_new - 900000) * 0.15
-        elif taxable_new > 600000: tax_new = 15000 + (taxable_new - 600000) * 0.10
-        elif taxable_new > 300000: tax_new = (taxable_new - 300000) * 0.05
-        new_regime_tax = round(tax_new * 1.04)
-        if taxable_new <= 700000: new_regime_tax = 0
-
-        # --- Write findings back to the context ---
-        context.recommended_regime = "New Regime" if new_regime_tax < old_regime_tax else "Old Regime"
-        if context.recommended_regime == "Old Regime":
-            if taxable_old > 1000000: context.tax_bracket = "30%"
-            elif taxable_old > 500000: context.tax_bracket = "20%"
-            else: context.tax_bracket = "5% or less"
-        else:
-            if taxable_new > 1500000: context.tax_bracket = "30%"
-            elif taxable_new > 1200000: context.tax_bracket = "20%"
-            else: context.tax_bracket = "15% or less"
-            
+        self.analyze(context)
         print_agent_message(self.name, f"I've analyzed your taxes. Your recommended regime is the {context.recommended_regime} and your marginal tax bracket is ~{context.tax_bracket}. I've updated the context.", self.color)
-        
+
+    def analyze(self, context: FinancialContext, tax=None):
+        """Writes the recommended regime and tax bracket to the context.
+
+        `tax` may be a compute_tax() result already produced elsewhere (e.g. on a worker pool).
+        """
+        # --- Perform Calculations and write findings back to the context ---
+        if tax is None:
+            with span("tax.compute"):
+                tax = compute_tax(context.income, context.deductions)
+        context.recommended_regime = tax["recommended_regime"]
+        context.tax_bracket = tax["tax_bracket"]
+        return tax
+
+    def build_prompt(self, context: FinancialContext):
         # This prompt is now more specific for better AI results
-        prompt = f"My annual income is {context.income:,.0f} INR with deductions of {context.deductions:,.0f} INR. My recommended tax regime is the {context.recommended_regime}. Briefly summarize why this regime is better for me."
-        ai_summary = call_generative_ai(prompt)
-        print_agent_message(self.name, ai_summary, self.color)
+        return f"My annual income is {context.income:,.0f} INR with deductions of {context.deductions:,.0f} INR. My recommended tax regime is the {context.recommended_regime}. Briefly summarize why this regime is better for me."
 
 
 class Investa(Agent):
     """The Investment Advisor Agent. Reads context, provides tailored advice."""
+    reads = ("age", "risk_tolerance", "tax_bracket")
+
     def __init__(self):
         super().__init__("Investa", colors.PURPLE)
 
-    def process(self, context: FinancialContext):
+    def prepare(self, context: FinancialContext):
         print_agent_message(self.name, "To give you tailored investment advice, I need to know your age and risk appetite.", self.color)
         
         if context.age is None:
@@ -168,32 +369,141 @@ class Investa(Agent):
                     break
                 else: print_agent_message(self.name, "Invalid choice.", colors.RED)
 
-        # --- Read from context and call AI for holistic advice ---
+        # --- Read from context before calling AI for holistic advice ---
         print_agent_message(self.name, f"Excellent. I see from the context that your tax bracket is {context.tax_bracket}. I will now generate a holistic plan.", self.color)
-        
-        prompt = f"Act as an expert financial advisor in India. Give me a holistic investment plan for a {context.age}-year-old with a '{context.risk_tolerance}' risk tolerance, who is in the {context.tax_bracket} tax bracket. Focus on actionable advice, specific investment types (like PPF, ELSS, Index Funds), and explain the rationale, especially how the tax bracket influences the choices."
-        detailed_advice = call_generative_ai(prompt)
-        print_agent_message(self.name, detailed_advice, self.color)
+
+    def build_prompt(self, context: FinancialContext):
+        return investment_prompt(context.age, context.risk_tolerance, context.tax_bracket)
+
+    def precomputed_advice(self, context: FinancialContext):
+        # The prompt only depends on these three fields, so common profiles can be served from the table
+        table = get_advice_table()
+        if table is None:
+            return None
+        return table.lookup(context.age, context.risk_tolerance, context.tax_bracket)
+
+
+def dependency_order(agents):
+    """Orders agents so each one runs after the agents that write the context fields it reads.
+
+    Independent agents keep their given order. Raises ValueError on a cycle.
+    """
+    producers = {}
+    for agent in agents:
+        for field in agent.writes:
+            producers.setdefault(field, []).append(agent)
+    pending = {
+        agent: {producer for field in agent.reads for producer in producers.get(field, ()) if producer is not agent}
+        for agent in agents
+    }
+    order = []
+    while pending:
+        ready = [agent for agent in agents if agent in pending and not pending[agent]]
+        if not ready:
+            raise ValueError("Agents have a circular dependency: " + ", ".join(agent.name for agent in pending))
+        for agent in ready:
+            del pending[agent]
+            order.append(agent)
+        for waiting_on in pending.values():
+            waiting_on.difference_update(ready)
+    return order
+
 
 class Finley:
-    """The Chief Orchestrator Agent"""
-    def __init__(self):
+    """The Chief Orchestrator Agent
+
+    With stream=True (or FINLEY_STREAM=1) advice is shown as the model produces it.
+    With a session_id and a SessionStore, answers are remembered between runs.
+    """
+    def __init__(self, stream=None, session_id=None, sessions=None):
+        self.stream = os.getenv("FINLEY_STREAM") == "1" if stream is None else stream
+        self.session_id = session_id
+        self.sessions = sessions
         self.tax_agent = Taxwell()
         self.investment_agent = Investa()
+        self.agents = [self.tax_agent, self.investment_agent]
+        self.handoffs = {
+            self.investment_agent: "Great. Now that we have your tax profile, I will bring in Investa to provide a tailored investment strategy.",
+        }
+
+    async def run_agents(self, context: FinancialContext):
+        """Runs every agent's local step in dependency order and their AI calls concurrently.
+
+        An agent's AI call is started as soon as its local step has written the
+        context, so it overlaps with later agents' prompts and AI calls. The
+        calls run quietly on worker threads, so nothing interleaves with the
+        prompts; returns (agent, advice, problem) triples in dependency order.
+        """
+        order = dependency_order(self.agents)
+        pending_advice = []
+        for agent in order:
+            if agent in self.handoffs:
+                print_agent_message("Finley", self.handoffs[agent], colors.BLUE)
+            with span("agent.prepare", agent=agent.name):
+                agent.prepare(context)
+            pending_advice.append(asyncio.create_task(agent.fetch_advice(context)))
+            # Let the task hand its model call to a worker thread before the next agent prompts the user
+            await asyncio.sleep(0)
+        return [(agent, advice, problem) for agent, (advice, problem) in zip(order, await asyncio.gather(*pending_advice))]
+
+    def stream_agents(self, context: FinancialContext):
+        """Streaming counterpart of run_agents: shows each agent's advice as it arrives.
+
+        Every stream starts right after its agent's local step, so later
+        agents' responses are already buffering while earlier ones render.
+        """
+        renderer = get_renderer()
+        streams = []
+        for agent in dependency_order(self.agents):
+            if agent in self.handoffs:
+                print_agent_message("Finley", self.handoffs[agent], colors.BLUE)
+            with span("agent.prepare", agent=agent.name):
+                agent.prepare(context)
+            streams.append((agent, agent.stream_advice(context)))
+        for agent, stream in streams:
+            with span("render.stream", agent=agent.name):
+                renderer.stream_message(agent.name, stream, agent.color)
+            if stream.problem is not None:
+                renderer.status(stream.problem, colors.RED)
+            if stream.first_chunk_s is None:
+                renderer.status(f"[{agent.name}: no output, complete after {stream.total_s:.2f}s]", colors.BLUE)
+            else:
+                renderer.status(f"[{agent.name}: first token after {stream.first_chunk_s:.2f}s, complete after {stream.total_s:.2f}s]", colors.BLUE)
+
+    def restore_context(self):
+        """Returns the returning user's saved context if they want to reuse it, else a fresh one."""
+        if self.sessions is None or self.session_id is None:
+            return FinancialContext()
+        saved = self.sessions.load(self.session_id)
+        if saved is None or saved.income is None:
+            return FinancialContext()
+        summary = f"income of ₹{saved.income:,.0f} and deductions of ₹{saved.deductions or 0:,.0f}"
+        if saved.age is not None and saved.risk_tolerance is not None:
+            summary += f", age {saved.age} and a '{saved.risk_tolerance}' risk tolerance"
+        print_agent_message("Finley", f"Welcome back! I still have your {summary} from last time.", colors.BLUE)
+        if get_user_input("Reuse these details? (y/n): ").strip().lower() in ("y", "yes", ""):
+            return saved
+        return FinancialContext()
 
     def get_holistic_plan(self):
         """Orchestrates a multi-agent workflow for a full financial plan."""
-        context = FinancialContext()
+        with span("plan.holistic", stream=self.stream):
+            self._holistic_plan()
+
+    def _holistic_plan(self):
+        context = self.restore_context()
         print_agent_message("Finley", "Understood. To create a holistic financial plan, I will orchestrate a collaboration between my specialist agents.", colors.BLUE)
-        
-        # Step 1: Call Taxwell to populate the context
-        self.tax_agent.process(context)
-        
-        print_agent_message("Finley", "Great. Now that we have your tax profile, I will bring in Investa to provide a tailored investment strategy.", colors.BLUE)
 
-        # Step 2: Call Investa, which can now read Taxwell's findings
-        self.investment_agent.process(context)
+        if self.stream:
+            self.stream_agents(context)
+        else:
+            for agent, advice, problem in asyncio.run(self.run_agents(context)):
+                if problem is not None:
+                    get_renderer().status(problem, colors.RED)
+                print_agent_message(agent.name, advice, agent.color)
 
+        if self.sessions is not None and self.session_id is not None:
+            self.sessions.save(self.session_id, context)
         print_agent_message("Finley", "Your personalized financial plan is complete.", colors.BLUE)
 
     def start(self):
@@ -210,6 +520,14 @@ class Finley:
                 print_agent_message("Finley", "I'm sorry, that's not a valid choice.", colors.BLUE)
             get_user_input("\nPress Enter to return to the main menu...")
 
+def open_session_store():
+    """Opens the session store at FINLEY_SESSION_DB (or the default location)."""
+    from sessions import DEFAULT_SESSION_DB, SessionStore
+    return SessionStore(FinancialContext.from_bytes, path=os.getenv("FINLEY_SESSION_DB", DEFAULT_SESSION_DB))
+
 if __name__ == "__main__":
-    chief_agent = Finley()
+    parser = argparse.ArgumentParser(description="Finley, your chief financial agent.")
+    parser.add_argument("--session", default=os.getenv("FINLEY_SESSION"), help="remember your answers under this session id")
+    args = parser.parse_args()
+    chief_agent = Finley(session_id=args.session, sessions=open_session_store() if args.session else None)
     chief_agent.start()
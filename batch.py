@@ -0,0 +1,164 @@
+#headless batch runner: streams FinancialContext-shaped records through the Taxwell/Investa logic
+#usage: python batch.py [input.csv|input.jsonl|-] [--format csv|jsonl] [--output results.jsonl]
+import argparse
+import csv
+import json
+import math
+import sys
+from itertools import islice
+
+from tax_engine import OLD_REGIME, compute_tax_batch
+from portfolio import RISK_LEVELS, recommend_allocation
+
+DEFAULT_CHUNK_SIZE = 4096
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def read_records(stream, fmt):
+    """Yields (line number, raw record dict) pairs from a CSV or JSONL stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        # Headers are matched like population.csv_shards does: case-insensitively, ignoring surrounding spaces
+        # and a byte order mark (which files are opened to drop, but stdin may still carry)
+        if reader.fieldnames is not None:
+            reader.fieldnames = [name.lstrip("\ufeff").strip().lower() for name in reader.fieldnames]
+        for line_no, row in enumerate(reader, start=2):
+            yield line_no, row
+    else:
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, {"_error": f"invalid JSON: {e}"}
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def parse_age(value):
+    """Validates an age given as a whole number or a string of one (30 or "30", not 30.9 or "30.0")."""
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError("age must be a whole number")
+    try:
+        age = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("age must be a whole number")
+    if not 18 <= age <= 100:
+        raise ValueError("age must be between 18 and 100")
+    return age
+
+
+def parse_profile(raw):
+    """Validates a raw record the same way the interactive agents validate user input."""
+    if not isinstance(raw, dict):
+        raise ValueError("record must be an object with income, deductions, age and risk_tolerance")
+    if "_error" in raw:
+        raise ValueError(raw["_error"])
+    try:
+        income = float(raw["income"])
+        deductions = 0.0 if _is_blank(raw.get("deductions")) else float(raw["deductions"])
+    except KeyError:
+        raise ValueError("income is required")
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("income and deductions must be numbers")
+    if not (math.isfinite(income) and math.isfinite(deductions)):
+        raise ValueError("income and deductions must be finite numbers")
+    if income < 0 or deductions < 0:
+        raise ValueError("income and deductions must be positive numbers")
+
+    age = None if _is_blank(raw.get("age")) else parse_age(raw["age"])
+
+    risk_tolerance = None
+    if not _is_blank(raw.get("risk_tolerance")):
+        risk_tolerance = str(raw["risk_tolerance"]).strip().lower()
+        if risk_tolerance not in RISK_LEVELS:
+            raise ValueError("risk_tolerance must be 'low', 'medium' or 'high'")
+
+    return {"income": income, "deductions": deductions, "age": age, "risk_tolerance": risk_tolerance}
+
+
+def _evaluate_chunk(profiles):
+    """Runs one chunk of parsed profiles through the tax engine and allocation logic."""
+    tax = compute_tax_batch([p["income"] for p in profiles], [p["deductions"] for p in profiles])
+    columns = zip(
+        tax["old_regime_tax"].tolist(),
+        tax["new_regime_tax"].tolist(),
+        tax["rebate_old"].tolist(),
+        tax["rebate_new"].tolist(),
+        tax["recommended_regime"].tolist(),
+        tax["tax_bracket"].tolist(),
+    )
+    for profile, (old_tax, new_tax, rebate_old, rebate_new, regime, bracket) in zip(profiles, columns):
+        result = dict(profile)
+        result["old_regime_tax"] = old_tax
+        result["new_regime_tax"] = new_tax
+        result["rebate_87a"] = rebate_old if regime == OLD_REGIME else rebate_new
+        result["recommended_regime"] = regime
+        result["tax_bracket"] = bracket
+        if profile["age"] is not None and profile["risk_tolerance"] is not None:
+            result["allocation"] = recommend_allocation(profile["age"], profile["risk_tolerance"])
+        else:
+            result["allocation"] = None
+        yield result
+
+
+def run_pipeline(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lazily turns (line number, raw record) pairs into result dicts, in input order.
+
+    Records are processed in fixed-size chunks so memory use does not grow
+    with the size of the input; invalid records yield an error result.
+    """
+    records = iter(records)
+    while True:
+        entries = []
+        profiles = []
+        for line_no, raw in islice(records, chunk_size):
+            try:
+                profiles.append(parse_profile(raw))
+                entries.append((line_no, None))
+            except ValueError as e:
+                entries.append((line_no, str(e)))
+        if not entries:
+            return
+        results = _evaluate_chunk(profiles) if profiles else iter(())
+        for line_no, error in entries:
+            if error is not None:
+                yield {"line": line_no, "error": error}
+            else:
+                result = next(results)
+                result["line"] = line_no
+                yield result
+
+
+def _detect_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Finley's tax and investment pipeline over a file of profiles.")
+    parser.add_argument("input", nargs="?", default="-", help="CSV or JSONL file, or '-' for stdin (default)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from file extension, jsonl for stdin)")
+    parser.add_argument("--output", default="-", help="JSONL output file, or '-' for stdout (default)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records evaluated per vectorized batch")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("jsonl" if args.input == "-" else _detect_format(args.input))
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for result in run_pipeline(read_records(source, fmt), chunk_size=args.chunk_size):
+            sink.write(_encode(result) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
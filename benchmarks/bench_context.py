@@ -0,0 +1,91 @@
+#per-context memory and serialize/deserialize throughput of FinancialContext
+#usage: python -m benchmarks.bench_context [--count 200000]
+import argparse
+import json
+import pickle
+import random
+import time
+import tracemalloc
+
+from app2 import FinancialContext
+
+
+class DictContext:
+    """The original dict-backed FinancialContext, kept for comparison."""
+    def __init__(self):
+        self.income = None
+        self.deductions = None
+        self.age = None
+        self.risk_tolerance = None
+        self.tax_bracket = "Unknown"
+        self.recommended_regime = "Unknown"
+
+
+def _profiles(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (float(rng.randrange(0, 5000000)), float(rng.randrange(0, 500000)), rng.randint(18, 100),
+         rng.choice(("low", "medium", "high")), rng.choice(("5% or less", "15% or less", "20%", "30%")),
+         rng.choice(("Old Regime", "New Regime")))
+        for _ in range(count)
+    ]
+
+
+def _fill(cls, profile):
+    context = cls()
+    (context.income, context.deductions, context.age, context.risk_tolerance,
+     context.tax_bracket, context.recommended_regime) = profile
+    return context
+
+
+def bytes_per_object(build, count):
+    """Average bytes allocated per object built by `build(i)`."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the objects is not part of their cost
+    return (after - before) / count - 8, objects
+
+
+def ops_per_second(fn, items):
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - started)
+
+
+def run(count):
+    profiles = _profiles(count)
+    dict_bytes, _ = bytes_per_object(lambda i: _fill(DictContext, profiles[i]), count)
+    slot_bytes, contexts = bytes_per_object(lambda i: _fill(FinancialContext, profiles[i]), count)
+    blob_bytes, blobs = bytes_per_object(lambda i: contexts[i].to_bytes(), count)
+    pickled = [pickle.dumps(c) for c in contexts]
+    return {
+        "count": count,
+        "bytes_per_context": {
+            "dict_backed": round(dict_bytes, 1),
+            "slotted": round(slot_bytes, 1),
+            "serialized_in_memory": round(blob_bytes, 1),
+            "serialized_payload": sum(map(len, blobs)) / count,
+            "pickle_payload": sum(map(len, pickled)) / count,
+        },
+        "ops_per_second": {
+            "to_bytes": round(ops_per_second(FinancialContext.to_bytes, contexts)),
+            "from_bytes": round(ops_per_second(FinancialContext.from_bytes, blobs)),
+            "pickle_dumps": round(ops_per_second(pickle.dumps, contexts)),
+            "pickle_loads": round(ops_per_second(pickle.loads, pickled)),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FinancialContext memory and serialization.")
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.count), indent=2))
+
+
+if __name__ == "__main__":
+    main()
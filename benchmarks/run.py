@@ -0,0 +1,269 @@
+#benchmark suite: tax engine, agent pipeline, agent output path, startup, goal projection and context memory
+#results are JSON; comparing against a stored baseline flags regressions (exit status 1)
+#usage: python -m benchmarks.run [--only tax,plan,render,startup,projection,context] [--model-latency 0.2] [--baseline benchmarks/baseline.json] [--save-baseline]
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.30
+
+
+def _metric(value, unit, better):
+    """`better` is "higher" or "lower" for gated metrics, "info" for settings that must match the baseline,
+    "never" for counts that must stay 0 and "report" for derived figures that are shown but not gated."""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def bench_tax(profiles=200000, scalar_profiles=50000, repeats=5):
+    """Scalar vs batch throughput of the Taxwell slab computation (best of `repeats` timings each)."""
+    from tax_engine import compute_tax, compute_tax_batch
+
+    rng = np.random.default_rng(0)
+    incomes = rng.uniform(0, 5000000, profiles)
+    deductions = rng.uniform(0, 500000, profiles)
+
+    scalar_incomes = incomes[:scalar_profiles].tolist()
+    scalar_deductions = deductions[:scalar_profiles].tolist()
+    scalar_times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for income, deduction in zip(scalar_incomes, scalar_deductions):
+            compute_tax(income, deduction)
+        scalar_times.append(time.perf_counter() - started)
+    scalar_rate = scalar_profiles / min(scalar_times)
+
+    compute_tax_batch(incomes[:1000], deductions[:1000])  # warm up
+    batch_times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        compute_tax_batch(incomes, deductions)
+        batch_times.append(time.perf_counter() - started)
+    batch_rate = profiles / min(batch_times)
+
+    return {
+        "tax.scalar_throughput": _metric(scalar_rate, "profiles/s", "higher"),
+        "tax.batch_throughput": _metric(batch_rate, "profiles/s", "higher"),
+        # A ratio of two noisy rates; each rate is gated on its own
+        "tax.batch_speedup": _metric(batch_rate / scalar_rate, "x", "report"),
+    }
+
+
+def bench_plan(runs=5, model_latency=0.2):
+    """End-to-end Finley.get_holistic_plan latency against a fake model with fixed latency."""
+    import app2
+    from ai_cache import set_response_cache
+    from fake_model import FakeModel
+    from model_pool import ModelPool, set_model_pool
+    from renderers import PlainRenderer, set_renderer
+
+    previous_renderer = set_renderer(PlainRenderer(stream=io.StringIO()))
+    previous_cache = set_response_cache(None)
+    previous_pool = set_model_pool(ModelPool(app2.MODEL_NAME, factory=lambda name: FakeModel(name, latency=model_latency)))
+    original_input = app2.get_user_input
+    rng = random.Random(0)
+    latencies = []
+    try:
+        for _ in range(runs):
+            answers = iter([str(rng.randrange(300000, 3000000)), str(rng.randrange(0, 300000)),
+                            str(rng.randint(18, 80)), rng.choice(("low", "medium", "high"))])
+            app2.get_user_input = lambda prompt: next(answers)
+            started = time.perf_counter()
+            app2.Finley(stream=False).get_holistic_plan()
+            latencies.append(time.perf_counter() - started)
+    finally:
+        app2.get_user_input = original_input
+        set_renderer(previous_renderer)
+        set_response_cache(previous_cache)
+        if previous_pool is not None:
+            set_model_pool(previous_pool)
+
+    return {
+        "plan.model_latency": _metric(model_latency, "s", "info"),
+        "plan.latency_median": _metric(statistics.median(latencies), "s", "lower"),
+        "plan.latency_max": _metric(max(latencies), "s", "lower"),
+        # How much of the two sequential model round trips the plan hides
+        "plan.model_overlap": _metric(2 * model_latency / statistics.median(latencies), "x", "higher"),
+    }
+
+
+def bench_render(messages=5000):
+    """Per-message overhead of print_agent_message (textwrap.fill and output) for each renderer."""
+    import app2
+    from renderers import EventRenderer, PlainRenderer, TTYRenderer, colors, set_renderer
+
+    text = ("Based on your income and deductions, the New Regime keeps more money in your pocket this year. "
+            "Consider ELSS, PPF and index funds to balance growth with tax efficiency. ") * 4
+    results = {}
+    for name, renderer in (("tty", TTYRenderer(typing_delay=0, stream=io.StringIO())),
+                           ("plain", PlainRenderer(stream=io.StringIO())),
+                           ("events", EventRenderer(stream=io.StringIO()))):
+        previous = set_renderer(renderer)
+        try:
+            started = time.perf_counter()
+            for _ in range(messages):
+                app2.print_agent_message("Investa", text, colors.PURPLE)
+            elapsed = time.perf_counter() - started
+        finally:
+            set_renderer(previous)
+        results[f"render.{name}_per_message"] = _metric(elapsed / messages * 1e6, "us", "lower")
+    return results
+
+
+def _time_to_prompt(script, env):
+    """Seconds from launching `python script` until it asks the user for input."""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script], cwd=REPO_ROOT, env=env,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        output = b""
+        # input() flushes stdout before blocking, so the prompt marker arrives as soon as it is reached
+        while b"> " not in output:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                raise RuntimeError(f"{script} exited before prompting for input")
+            output += chunk
+        return time.perf_counter() - started
+    finally:
+        process.kill()
+        process.wait()
+
+
+def bench_startup(runs=5):
+    """Interpreter launch to first user prompt for the interactive apps, plus whether the AI SDK was loaded."""
+    env = {**os.environ, "FINLEY_RENDERER": "plain", "PYTHONWARNINGS": "ignore"}
+    results = {}
+    for name, script in (("app", "app.py"), ("app2", "app2.py")):
+        timings = [_time_to_prompt(script, env) for _ in range(runs)]
+        results[f"startup.{name}_to_first_prompt"] = _metric(statistics.median(timings), "s", "lower")
+    # The SDK must only be imported by the first model call, never at startup
+    probe = subprocess.run([sys.executable, "-c", "import sys, app2; print('google.generativeai' in sys.modules)"],
+                           cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+    results["startup.sdk_imported"] = _metric(int(probe.stdout.strip() == "True"), "bool", "never")
+    return results
+
+
+def bench_projection(runs=3, paths=50000, years=40):
+    """Monte Carlo corpus projection: a full run of monthly paths to retirement."""
+    from montecarlo import project
+    from portfolio import recommend_allocation
+
+    age = 60 - years
+    allocation = recommend_allocation(age, "medium")
+    timings = []
+    for seed in range(runs):
+        started = time.perf_counter()
+        project(allocation, age, 20000, step_up=0.05, paths=paths, seed=seed)
+        timings.append(time.perf_counter() - started)
+    elapsed = statistics.median(timings)
+    return {
+        "projection.paths": _metric(paths, "paths", "info"),
+        "projection.months": _metric(years * 12, "months", "info"),
+        "projection.run_time": _metric(elapsed, "s", "lower"),
+        "projection.path_months_per_s": _metric(paths * years * 12 / elapsed, "path-months/s", "higher"),
+    }
+
+
+def bench_context(count=50000, repeats=3):
+    """FinancialContext memory and serialization throughput (see benchmarks/bench_context.py), best of `repeats`."""
+    from benchmarks.bench_context import run
+
+    results = [run(count) for _ in range(repeats)]
+    sizes = results[0]["bytes_per_context"]
+    ops = {name: max(r["ops_per_second"][name] for r in results) for name in ("to_bytes", "from_bytes")}
+    return {
+        "context.count": _metric(count, "contexts", "info"),
+        "context.slotted_bytes": _metric(sizes["slotted"], "bytes", "lower"),
+        "context.serialized_payload_bytes": _metric(sizes["serialized_payload"], "bytes", "lower"),
+        "context.to_bytes_throughput": _metric(ops["to_bytes"], "ops/s", "higher"),
+        "context.from_bytes_throughput": _metric(ops["from_bytes"], "ops/s", "higher"),
+    }
+
+
+BENCHMARKS = {
+    "tax": bench_tax,
+    "plan": bench_plan,
+    "render": bench_render,
+    "startup": bench_startup,
+    "projection": bench_projection,
+    "context": bench_context,
+}
+
+
+def compare(results, baseline, tolerance):
+    """Returns human-readable regressions of `results` against `baseline` beyond `tolerance`."""
+    references = baseline.get("metrics", {})
+    # A group run with different settings (its "info" metrics) is not comparable to the baseline
+    reconfigured = {name.split(".")[0] for name, metric in results.items()
+                    if metric["better"] == "info" and name in references and references[name]["value"] != metric["value"]}
+    regressions = []
+    for name, metric in results.items():
+        if metric["better"] == "never":
+            if metric["value"]:
+                regressions.append(f"{name}: must stay 0, got {metric['value']}")
+            continue
+        reference = references.get(name)
+        if (reference is None or metric["better"] not in ("higher", "lower") or not reference["value"]
+                or name.split(".")[0] in reconfigured):
+            continue
+        change = (metric["value"] - reference["value"]) / reference["value"]
+        worse = -change if metric["better"] == "higher" else change
+        if worse > tolerance:
+            regressions.append(f"{name}: {metric['value']:.4g} {metric['unit']} vs baseline "
+                               f"{reference['value']:.4g} ({worse:.0%} worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Finley's benchmark suite.")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated subset of " + ", ".join(BENCHMARKS))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed fractional slowdown")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--output", help="also write the results JSON to this file")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="seconds per fake model call in the plan benchmark")
+    parser.add_argument("--plan-runs", type=int, default=5, help="holistic plans to time")
+    args = parser.parse_args(argv)
+
+    options = {"plan": {"runs": args.plan_runs, "model_latency": args.model_latency}}
+    metrics = {}
+    for name in (n.strip() for n in args.only.split(",") if n.strip()):
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+        metrics.update(BENCHMARKS[name](**options.get(name, {})))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "metrics": metrics,
+    }
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(metrics, json.load(f), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"metrics": metrics}, indent=2) + "\n")
+    if report.get("regressions"):
+        print("Performance regressions against the baseline:\n  " + "\n  ".join(report["regressions"]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#local stand-in for the Gemini model, used by tests, benchmarks and load tests
+#select it for the whole process with FINLEY_MODEL_BACKEND=fake (FINLEY_FAKE_LATENCY=<seconds>)
+import time
+
+
+class RateLimitError(Exception):
+    """A provider-style HTTP 429, carrying the status as `code` like google.api_core errors do."""
+    code = 429
+
+    def __init__(self, message="Resource has been exhausted (e.g. check quota).", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FakeResponse:
+    """Mimics the `.text` attribute of a generate_content response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """A GenerativeModel look-alike that answers after a fixed latency.
+
+    `reply` is a callable mapping the prompt to the response text. With
+    stream=True the text is yielded in chunks of `chunk_words` words: the
+    first after `first_chunk_latency` seconds, and the whole response after
+    `latency` seconds, as a real streaming call would.
+
+    `quota` simulates the provider's rate limit: an object with try_acquire()
+    (e.g. a scheduler.TokenBucket shared by every handle) that is consulted on
+    each call, and a call it refuses fails at once with RateLimitError.
+    """
+
+    def __init__(self, model_name="fake", latency=0.0, reply=None, first_chunk_latency=None, chunk_words=8, quota=None):
+        self.model_name = model_name
+        self.latency = latency
+        self.first_chunk_latency = latency / 10 if first_chunk_latency is None else first_chunk_latency
+        self.chunk_words = chunk_words
+        self.reply = reply or (lambda prompt: f"[{model_name}] advice for: {prompt}")
+        self.quota = quota
+        self.calls = 0
+        self.rate_limited = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if self.quota is not None and not self.quota.try_acquire():
+            self.rate_limited += 1
+            raise RateLimitError()
+        if stream:
+            return self._stream(self.reply(prompt))
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(self.reply(prompt))
+
+    def _stream(self, text):
+        words = text.split(" ")
+        chunks = [" ".join(words[i:i + self.chunk_words]) for i in range(0, len(words), self.chunk_words)]
+        # Every chunk but the last carries the space that separated it from the next one
+        chunks = [chunk + " " for chunk in chunks[:-1]] + chunks[-1:]
+        gap = max(0.0, self.latency - self.first_chunk_latency) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            delay = self.first_chunk_latency if i == 0 else gap
+            if delay:
+                time.sleep(delay)
+            yield FakeResponse(chunk)
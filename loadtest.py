@@ -0,0 +1,164 @@
+#load-test harness for server.py
+#by default starts an in-process server backed by the fake model, then reports latency percentiles and throughput
+#usage: python loadtest.py [--url http://host:port] [--requests 2000] [--concurrency 50] [--model-latency 0.2]
+#       add --fake-rate-limit N to have the fake provider answer 429 beyond N calls/s, --rate-limit M to throttle client-side
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ai_cache import set_response_cache
+from app2 import MODEL_NAME
+from fake_model import FakeModel
+from model_pool import ModelPool, set_model_pool
+from renderers import PlainRenderer, set_renderer
+from scheduler import Scheduler, TokenBucket, get_scheduler, set_scheduler
+from server import FinleyServer
+
+ENDPOINTS = ("tax", "invest", "itr", "plan")
+
+
+def random_payload(endpoint, rng):
+    """Builds a plausible request body for an endpoint."""
+    profile = {
+        "income": rng.randrange(200000, 4000000, 1000),
+        "deductions": rng.randrange(0, 500000, 1000),
+        "age": rng.randint(18, 80),
+        "risk_tolerance": rng.choice(("low", "medium", "high")),
+    }
+    if endpoint == "tax":
+        return {"income": profile["income"], "deductions": profile["deductions"]}
+    if endpoint == "invest":
+        return {"age": profile["age"], "risk_tolerance": profile["risk_tolerance"], "tax_bracket": "30%"}
+    if endpoint == "itr":
+        return {"form": rng.choice(("ITR-1", "ITR-2", "unsure"))}
+    return profile
+
+
+async def _request(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, endpoints, jobs, latencies, failures, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while jobs:
+            jobs.pop()
+            endpoint = rng.choice(endpoints)
+            started = time.perf_counter()
+            status = await _request(reader, writer, host, "/" + endpoint, random_payload(endpoint, rng))
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+async def run_load(host, port, total_requests, concurrency, endpoints):
+    """Drives the server with `concurrency` keep-alive clients and returns a summary dict."""
+    jobs = list(range(total_requests))
+    latencies, failures = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, endpoints, jobs, latencies, failures, seed)
+        for seed in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "failures": len(failures),
+        "concurrency": concurrency,
+        "endpoints": list(endpoints),
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def start_local_server(model_latency, pool_size, workers, fake_rate_limit=None, rate_limit=None):
+    """Runs a FinleyServer backed by FakeModel on a background thread; returns its (host, port).
+
+    With fake_rate_limit the fake provider rejects calls beyond that many per
+    second with 429s; rate_limit throttles Finley's own scheduler.
+    """
+    set_renderer(PlainRenderer(stream=open(os.devnull, "w")))
+    set_response_cache(None)  # measure the model path, not the cache
+    quota = TokenBucket(fake_rate_limit) if fake_rate_limit else None
+    set_model_pool(ModelPool(MODEL_NAME, size=pool_size,
+                             factory=lambda name: FakeModel(name, latency=model_latency, quota=quota)))
+    set_scheduler(Scheduler(MODEL_NAME, rate=rate_limit, max_concurrency=pool_size))
+
+    ready = threading.Event()
+    address = {}
+
+    def serve():
+        async def main():
+            server = FinleyServer(workers=workers)
+            listener = await server.start("127.0.0.1", 0)
+            address["host"], address["port"] = listener.sockets[0].getsockname()[:2]
+            ready.set()
+            await listener.serve_forever()
+        asyncio.run(main())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return address["host"], address["port"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test Finley's HTTP server.")
+    parser.add_argument("--url", help="target an already running server instead of a local fake-backed one")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset of " + ", ".join(ENDPOINTS))
+    parser.add_argument("--model-latency", type=float, default=0.2, help="seconds per fake model call (local server only)")
+    parser.add_argument("--pool-size", type=int, default=64, help="fake model handles (local server only)")
+    parser.add_argument("--workers", type=int, default=None, help="tax worker processes (local server only)")
+    parser.add_argument("--fake-rate-limit", type=float, default=None, help="fake provider answers 429 beyond this many calls/s (local server only)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="scheduler's own calls/s limit (local server only)")
+    args = parser.parse_args(argv)
+
+    endpoints = tuple(e.strip() for e in args.endpoints.split(",") if e.strip())
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = start_local_server(args.model_latency, args.pool_size, args.workers,
+                                        args.fake_rate_limit, args.rate_limit)
+
+    summary = asyncio.run(run_load(host, port, args.requests, args.concurrency, endpoints))
+    if not args.url:
+        summary["scheduler"] = get_scheduler(MODEL_NAME).stats()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
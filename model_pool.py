@@ -0,0 +1,233 @@
+#long-lived pool of generative model handles shared by every agent in the process
+#the Gemini client is configured once; handles keep their underlying connection alive between calls
+#configured with FINLEY_MODEL_POOL_SIZE=<n>, FINLEY_MODEL_BACKEND=gemini|fake
+#the Gemini SDK is only imported on the first model call, so local-only paths never pay for (or need) it
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from fake_model import FakeModel
+from tracing import span, token_counts
+
+DEFAULT_POOL_SIZE = 4
+TIMING_WINDOW = 1024  # most recent call durations kept for percentiles
+
+
+class APIKeyError(Exception):
+    """Raised when the Gemini API key is still the documentation placeholder."""
+
+
+_configure_lock = threading.Lock()
+_genai = None  # the google.generativeai module, once imported and configured
+
+
+def configure_gemini():
+    """Imports the Gemini SDK and configures it once per process from GOOGLE_API_KEY; returns the SDK module."""
+    global _genai
+    if _genai is not None:
+        return _genai
+    with _configure_lock:
+        if _genai is not None:
+            return _genai
+        # Set it in your terminal before running: export GOOGLE_API_KEY="YOUR_API_KEY"
+        api_key = os.getenv("GOOGLE_API_KEY", "")
+        if api_key == "YOUR_API_KEY_HERE":
+            raise APIKeyError("Please replace 'YOUR_API_KEY_HERE' with your actual Gemini API key.")
+        try:
+            import google.generativeai as genai
+        except ImportError as e:
+            raise ImportError("The Gemini SDK is not installed; run 'pip install google-generativeai' "
+                              "or set FINLEY_MODEL_BACKEND=fake") from e
+        genai.configure(api_key=api_key)
+        _genai = genai
+    return _genai
+
+
+def gemini_model(model_name):
+    """Builds one Gemini model handle on the shared, configured client."""
+    return configure_gemini().GenerativeModel(model_name)
+
+
+def fake_model(model_name):
+    """Builds one local fake model handle, with latency from FINLEY_FAKE_LATENCY."""
+    return FakeModel(model_name, latency=float(os.getenv("FINLEY_FAKE_LATENCY", "0")))
+
+
+BACKENDS = {
+    "gemini": gemini_model,
+    "fake": fake_model,
+}
+
+
+class ModelPool:
+    """A bounded pool of model handles that threads and async tasks can share.
+
+    Handles are built lazily by `factory(model_name)` up to `size`; callers
+    beyond that wait for a handle to be returned.
+    """
+
+    def __init__(self, model_name, size=DEFAULT_POOL_SIZE, factory=gemini_model):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.model_name = model_name
+        self.size = size
+        self._factory = factory
+        self._idle = queue.LifoQueue()  # most recently used handle first, so its connection is warm
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self.calls = 0
+        self.errors = 0
+        self._total_call_time = 0.0
+        self._total_wait_time = 0.0
+        self._acquisitions = 0
+        self._durations = deque(maxlen=TIMING_WINDOW)
+        self._first_chunk_times = deque(maxlen=TIMING_WINDOW)
+
+    def _take(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self._created < self.size
+            if build:
+                self._created += 1
+        if build:
+            try:
+                return self._factory(self.model_name)
+            except BaseException:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No model handle became available within {timeout}s") from None
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Checks a model handle out of the pool for the duration of the block."""
+        started = time.perf_counter()
+        model = self._take(timeout)
+        with self._lock:
+            self._in_use += 1
+            self._acquisitions += 1
+            self._total_wait_time += time.perf_counter() - started
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(model)
+
+    def generate(self, prompt, timeout=None, **kwargs):
+        """Runs generate_content on a pooled handle and records its timing."""
+        with span("model.generate", model=self.model_name) as trace, self.acquire(timeout) as model:
+            started = time.perf_counter()
+            try:
+                response = model.generate_content(prompt, **kwargs)
+                trace.set(**token_counts(prompt, response))
+                return response
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.calls += 1
+                    self._total_call_time += elapsed
+                    self._durations.append(elapsed)
+
+    def stream(self, prompt, timeout=None, **kwargs):
+        """Yields the text of each chunk of a streaming generate_content call.
+
+        The handle stays checked out until the stream is exhausted or closed;
+        time to the first chunk is recorded alongside the total call time.
+        """
+        with span("model.stream", model=self.model_name) as trace, self.acquire(timeout) as model:
+            started = time.perf_counter()
+            first_chunk = None
+            parts = []
+            try:
+                for chunk in model.generate_content(prompt, stream=True, **kwargs):
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                    parts.append(chunk.text)
+                    yield chunk.text
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                trace.set(first_chunk_ms=first_chunk * 1000 if first_chunk is not None else None,
+                          **token_counts(prompt, "".join(parts)))
+                with self._lock:
+                    self.calls += 1
+                    self._total_call_time += elapsed
+                    self._durations.append(elapsed)
+                    if first_chunk is not None:
+                        self._first_chunk_times.append(first_chunk)
+
+    async def agenerate(self, prompt, timeout=None, **kwargs):
+        """Async variant of generate(); the blocking SDK call runs on a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, timeout, **kwargs)
+
+    def stats(self):
+        """Returns pool occupancy and per-call timing statistics (seconds)."""
+        with self._lock:
+            durations = sorted(self._durations)
+            first_chunks = sorted(self._first_chunk_times)
+            calls = self.calls
+
+            def percentile(p, values=durations):
+                return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "calls": calls,
+                "errors": self.errors,
+                "avg_call": self._total_call_time / calls if calls else 0.0,
+                "p50_call": percentile(0.50),
+                "p99_call": percentile(0.99),
+                "max_call": durations[-1] if durations else 0.0,
+                "streams": len(first_chunks),
+                "p50_first_chunk": percentile(0.50, first_chunks),
+                "p99_first_chunk": percentile(0.99, first_chunks),
+                "avg_wait": self._total_wait_time / self._acquisitions if self._acquisitions else 0.0,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_model_pool(model_name):
+    """Returns the process-wide pool for a model, built from the environment on first use."""
+    pool = _pools.get(model_name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(model_name)
+            if pool is None:
+                backend = os.getenv("FINLEY_MODEL_BACKEND", "gemini")
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown model backend {backend!r}; choose from {', '.join(BACKENDS)}")
+                size = int(os.getenv("FINLEY_MODEL_POOL_SIZE", DEFAULT_POOL_SIZE))
+                pool = _pools[model_name] = ModelPool(model_name, size=size, factory=BACKENDS[backend])
+    return pool
+
+
+def set_model_pool(pool):
+    """Installs a pool (e.g. one backed by FakeModel) for its model name and returns the previous one."""
+    with _pools_lock:
+        previous = _pools.get(pool.model_name)
+        _pools[pool.model_name] = pool
+    return previous
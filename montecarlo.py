@@ -0,0 +1,164 @@
+#Monte Carlo goal projection for Investa's allocations
+#simulates monthly portfolio growth with contributions up to retirement and reports corpus percentiles
+#usage: python montecarlo.py --age 30 --risk medium --monthly 20000 [--step-up 0.1] [--retirement-age 60] [--goal 50000000]
+import argparse
+import json
+import time
+
+import numpy as np
+
+from portfolio import ASSET_CLASSES, RISK_LEVELS, recommend_allocation
+
+DEFAULT_PATHS = 50_000
+DEFAULT_CHUNK_PATHS = 8192  # paths simulated at once; memory is chunk_paths x months floats
+DEFAULT_RETIREMENT_AGE = 60
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+DEFAULT_INFLATION = 0.06
+
+# Long-run annual (expected return, volatility) per asset class, in INR terms
+DEFAULT_ASSUMPTIONS = {
+    "equity": (0.12, 0.18),
+    "debt": (0.07, 0.03),
+    "hybrid": (0.10, 0.10),
+    "international_equity": (0.10, 0.20),
+    "alternatives": (0.09, 0.15),
+}
+
+# Correlations between asset classes; pairs that are not listed are uncorrelated
+DEFAULT_CORRELATIONS = {
+    ("equity", "hybrid"): 0.85,
+    ("equity", "international_equity"): 0.60,
+    ("equity", "debt"): 0.10,
+    ("debt", "hybrid"): 0.40,
+    ("equity", "alternatives"): 0.30,
+    ("international_equity", "alternatives"): 0.30,
+}
+
+
+def portfolio_moments(allocation, assumptions=None, correlations=None):
+    """Annual expected return and volatility of a monthly-rebalanced allocation given in percent."""
+    assumptions = assumptions or DEFAULT_ASSUMPTIONS
+    correlations = DEFAULT_CORRELATIONS if correlations is None else correlations
+    weights = np.array([allocation.get(asset, 0) for asset in ASSET_CLASSES], dtype=np.float64) / 100
+    returns = np.array([assumptions[asset][0] for asset in ASSET_CLASSES])
+    vols = np.array([assumptions[asset][1] for asset in ASSET_CLASSES])
+    correlation = np.eye(len(ASSET_CLASSES))
+    for (a, b), rho in correlations.items():
+        i, j = ASSET_CLASSES.index(a), ASSET_CLASSES.index(b)
+        correlation[i, j] = correlation[j, i] = rho
+    covariance = correlation * np.outer(vols, vols)
+    return float(weights @ returns), float(np.sqrt(weights @ covariance @ weights))
+
+
+def contribution_schedule(monthly, months, step_up=0.0):
+    """Monthly contributions that grow by `step_up` every twelve months (a stepped-up SIP)."""
+    return monthly * (1 + step_up) ** (np.arange(months) // 12)
+
+
+def simulate_corpus(expected_return, volatility, contributions, initial=0.0, paths=DEFAULT_PATHS,
+                    chunk_paths=DEFAULT_CHUNK_PATHS, seed=None):
+    """Final corpus of every simulated path.
+
+    Each month a contribution is added and the portfolio then grows by a
+    log-normal factor whose mean compounds to `expected_return` a year.
+    Paths are generated `chunk_paths` at a time, so memory stays bounded
+    however many paths are requested, and in antithetic pairs (every draw
+    is also used with its sign flipped), which halves the random numbers
+    needed and narrows the spread of the estimates. The per-path matrices
+    are float32, which is ample for corpus percentiles and twice as fast.
+    """
+    contributions = np.asarray(contributions, dtype=np.float64)
+    months = len(contributions)
+    monthly_vol = volatility / np.sqrt(12)
+    monthly_drift = np.log1p(expected_return) / 12 - monthly_vol ** 2 / 2
+    # Cumulative log growth after month t is drift[t] + shock[t]. A contribution made at the start of month t
+    # grows by exp(L[T-1] - L[t-1]), so the final corpus is exp(L[T-1]) * (initial + sum_t c[t] * exp(-L[t-1]));
+    # the deterministic drift part of exp(-L[t-1]) is folded into the contribution weights once
+    drift = monthly_drift * np.arange(1, months + 1)
+    weights = np.exp(-drift[:-1]) * contributions[1:]
+    # Scaled into float32's range before the cast; the scale is applied again in float64 below
+    scale = float(weights.max()) if len(weights) and weights.max() > 0 else 1.0
+    weights = (weights / scale).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    corpus = np.empty(paths)
+    chunk_paths += chunk_paths % 2
+    for start in range(0, paths, chunk_paths):
+        count = min(chunk_paths, paths - start)
+        shocks = rng.standard_normal(((count + 1) // 2, months), dtype=np.float32)
+        np.cumsum(shocks, axis=1, out=shocks)
+        shocks *= monthly_vol
+        final_shock = shocks[:, -1].copy()
+        earlier = shocks[:, :-1]
+        for sign, offset in ((1, 0), (-1, len(shocks))):
+            discount = (np.exp(-sign * earlier) @ weights).astype(np.float64) * scale
+            final = np.exp(drift[-1] + sign * final_shock) * (initial + contributions[0] + discount)
+            taken = min(len(final), count - offset)
+            corpus[start + offset:start + offset + taken] = final[:taken]
+    return corpus
+
+
+def project(allocation, age, monthly_contribution, retirement_age=DEFAULT_RETIREMENT_AGE, step_up=0.0,
+            initial_corpus=0.0, paths=DEFAULT_PATHS, seed=None, assumptions=None, inflation=DEFAULT_INFLATION,
+            goal=None, percentiles=DEFAULT_PERCENTILES):
+    """Projects the corpus at retirement for an allocation, age and contribution schedule.
+
+    Returns nominal and inflation-adjusted (today's rupees) corpus percentiles,
+    the total contributed and, given a nominal `goal`, the share of paths that reach it.
+    """
+    months = (retirement_age - age) * 12
+    if months <= 0:
+        raise ValueError("retirement_age must be greater than age")
+    expected_return, volatility = portfolio_moments(allocation, assumptions)
+    contributions = contribution_schedule(monthly_contribution, months, step_up)
+    with np.errstate(over="ignore"):
+        corpus = simulate_corpus(expected_return, volatility, contributions, initial_corpus, paths, seed=seed)
+        mean = corpus.mean()
+    if not (np.isfinite(mean) and np.isfinite(corpus).all()):
+        raise ValueError("The projected corpus overflows; use smaller contributions or step-up")
+    values = np.percentile(corpus, percentiles)
+    deflator = (1 + inflation) ** (months / 12)
+    projection = {
+        "years": months // 12,
+        "paths": paths,
+        "expected_return": expected_return,
+        "volatility": volatility,
+        "total_contributed": float(contributions.sum() + initial_corpus),
+        "corpus_percentiles": {f"p{p}": float(v) for p, v in zip(percentiles, values)},
+        "real_corpus_percentiles": {f"p{p}": float(v / deflator) for p, v in zip(percentiles, values)},
+        "mean_corpus": float(mean),
+    }
+    if goal is not None:
+        projection["goal"] = goal
+        projection["goal_probability"] = float(np.count_nonzero(corpus >= goal) / paths)
+    return projection
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo projection of the corpus at retirement for Investa's allocation.")
+    parser.add_argument("--age", type=int, required=True)
+    parser.add_argument("--risk", choices=RISK_LEVELS, required=True)
+    parser.add_argument("--monthly", type=float, required=True, help="monthly contribution in INR")
+    parser.add_argument("--step-up", type=float, default=0.0, help="yearly increase of the contribution, e.g. 0.1")
+    parser.add_argument("--initial", type=float, default=0.0, help="corpus already invested")
+    parser.add_argument("--retirement-age", type=int, default=DEFAULT_RETIREMENT_AGE)
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS)
+    parser.add_argument("--goal", type=float, default=None, help="target corpus in INR")
+    parser.add_argument("--inflation", type=float, default=DEFAULT_INFLATION)
+    parser.add_argument("--assumptions", help="JSON file mapping asset class to [expected return, volatility]")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    assumptions = None
+    if args.assumptions:
+        with open(args.assumptions, encoding="utf-8") as f:
+            assumptions = {**DEFAULT_ASSUMPTIONS, **{k: tuple(v) for k, v in json.load(f).items()}}
+    allocation = recommend_allocation(args.age, args.risk)
+    started = time.perf_counter()
+    projection = project(allocation, args.age, args.monthly, args.retirement_age, args.step_up, args.initial,
+                         args.paths, args.seed, assumptions, args.inflation, args.goal)
+    projection["elapsed_s"] = time.perf_counter() - started
+    print(json.dumps({"allocation": allocation, **projection}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
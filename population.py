@@ -0,0 +1,273 @@
+#population-scale simulation: runs the Taxwell and Investa logic over millions of profiles on a process pool
+#reports the regime split, bracket distribution and allocation mix of the whole population
+#usage: python population.py --synthetic 10000000 [--workers N] [--seed 0]
+#       python population.py profiles.csv [--workers N]      (columns: income, deductions, age, risk_tolerance)
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from portfolio import ASSET_CLASSES, RISK_LEVELS, recommend_allocation_batch
+from tax_engine import NEW_REGIME, OLD_REGIME, bracket_labels, get_tax_rules
+
+DEFAULT_SHARD_SIZE = 1_000_000  # profiles per task handed to a worker
+DEFAULT_CHUNK_SIZE = 262_144  # profiles evaluated at once inside a worker, bounding its memory
+DEFAULT_SHARD_BYTES = 32 * 1024 * 1024  # CSV bytes per task
+
+_NO_RISK = -1
+_NO_AGE, _BAD_AGE = -1, -2
+
+
+def empty_aggregate():
+    """The partial aggregate of zero profiles; every count is keyed by label so shards merge by addition."""
+    return {
+        "profiles": 0,
+        "invalid": 0,
+        "regimes": {OLD_REGIME: 0, NEW_REGIME: 0},
+        "brackets": dict.fromkeys(bracket_labels(), 0),
+        "risk": dict.fromkeys(RISK_LEVELS, 0),
+        "allocated": 0,
+        "allocation_sum": dict.fromkeys(ASSET_CLASSES, 0),
+        "tax_sum": 0,
+        "savings_sum": 0,
+    }
+
+
+def merge_aggregates(total, part):
+    """Adds the partial aggregate `part` into `total` in place and returns it."""
+    for key, value in part.items():
+        if isinstance(value, dict):
+            for label, count in value.items():
+                total[key][label] = total[key].get(label, 0) + count
+        else:
+            total[key] += value
+    return total
+
+
+def evaluate_columns(income, deductions, age, risk, year=None):
+    """Aggregates one columnar chunk: float income/deductions, integer age and risk index (-1 = unknown).
+
+    Only profiles with both an age and a risk level get an allocation, as in the batch runner.
+    """
+    aggregate = empty_aggregate()
+    aggregate["profiles"] = len(income)
+    if not len(income):
+        return aggregate
+    tax = get_tax_rules(year).compute_batch(income, deductions)
+
+    new_wins = tax["recommended_regime"] == NEW_REGIME
+    new_count = int(np.count_nonzero(new_wins))
+    aggregate["regimes"] = {OLD_REGIME: len(income) - new_count, NEW_REGIME: new_count}
+    # A handful of known labels, so comparing against each is much cheaper than sorting the strings
+    for label in aggregate["brackets"]:
+        aggregate["brackets"][label] = int(np.count_nonzero(tax["tax_bracket"] == label))
+    paid = np.where(new_wins, tax["new_regime_tax"], tax["old_regime_tax"])
+    aggregate["tax_sum"] = int(paid.sum())
+    aggregate["savings_sum"] = int(np.abs(tax["old_regime_tax"] - tax["new_regime_tax"]).sum())
+
+    known = risk != _NO_RISK
+    aggregate["risk"] = dict(zip(RISK_LEVELS, np.bincount(risk[known], minlength=len(RISK_LEVELS)).tolist()))
+    allocatable = known & (age > 0)
+    allocation = recommend_allocation_batch(age[allocatable], risk[allocatable])
+    aggregate["allocated"] = int(np.count_nonzero(allocatable))
+    aggregate["allocation_sum"] = dict(zip(ASSET_CLASSES, allocation.sum(axis=0).tolist()))
+    return aggregate
+
+
+def synthetic_columns(rng, count):
+    """A plausible population: log-normal incomes around 8 lakh, deductions up to 5 lakh, adult ages."""
+    income = np.round(rng.lognormal(np.log(800000), 0.8, count), -2)
+    deductions = np.round(np.minimum(rng.uniform(0, 0.3, count) * income, 500000), -2)
+    age = rng.integers(18, 81, count)
+    risk = rng.choice(len(RISK_LEVELS), size=count, p=(0.3, 0.5, 0.2))
+    return income, deductions, age, risk
+
+
+def _synthetic_shard(seed, shard_index, count, year, chunk_size):
+    # Seeded per shard, so results do not depend on how many workers ran the shards
+    rng = np.random.default_rng([seed, shard_index])
+    aggregate = empty_aggregate()
+    for start in range(0, count, chunk_size):
+        merge_aggregates(aggregate, evaluate_columns(*synthetic_columns(rng, min(chunk_size, count - start)), year=year))
+    return aggregate
+
+
+def _parse_float(values, default=None):
+    """Column of strings -> float array; blanks become `default` and anything unparsable NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        pass
+    parsed = np.empty(len(values))
+    for i, value in enumerate(values):
+        value = value.strip()
+        if not value:
+            parsed[i] = np.nan if default is None else default
+            continue
+        try:
+            parsed[i] = float(value)
+        except ValueError:
+            parsed[i] = np.nan
+    return parsed
+
+
+def _parse_age(values):
+    """Column of strings -> int array parsed like int(); blanks become _NO_AGE, anything else not in 0-100 _BAD_AGE."""
+    try:
+        parsed = np.array(values, dtype=np.int64)
+        parsed[(parsed < 0) | (parsed > 100)] = _BAD_AGE
+        return parsed
+    except (ValueError, OverflowError):
+        pass
+    parsed = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        if not value.strip():
+            parsed[i] = _NO_AGE
+            continue
+        try:
+            age = int(value)
+        except ValueError:
+            age = _BAD_AGE
+        parsed[i] = age if 0 <= age <= 100 else _BAD_AGE
+    return parsed
+
+
+def _csv_columns(rows, columns):
+    """Turns parsed CSV rows into validated columns; returns (income, deductions, age, risk, invalid count)."""
+    width = max(columns.values()) + 1
+    rows = [row for row in rows if row]
+    rows = [row + [""] * (width - len(row)) if len(row) < width else row for row in rows]
+    fields = list(zip(*rows)) if rows else [()] * width
+    blank = [""] * len(rows)
+
+    income = _parse_float(fields[columns["income"]])
+    deductions = _parse_float(fields[columns["deductions"]] if "deductions" in columns else blank, default=0.0)
+    age = _parse_age(fields[columns["age"]] if "age" in columns else blank)
+    risk_codes = {level: i for i, level in enumerate(RISK_LEVELS)}
+    risk_codes[""] = _NO_RISK
+    risk_raw = fields[columns["risk_tolerance"]] if "risk_tolerance" in columns else blank
+    risk = np.array([risk_codes.get(value.strip().lower(), -2) for value in risk_raw], dtype=np.int64)
+
+    # The same rules as batch.parse_profile, applied to whole columns
+    valid = (np.isfinite(income) & np.isfinite(deductions) & (income >= 0) & (deductions >= 0) & (risk != -2)
+             & ((age == _NO_AGE) | ((age >= 18) & (age <= 100))))
+    invalid = len(rows) - int(np.count_nonzero(valid))
+    # evaluate_columns takes 0 for a missing age
+    return income[valid], deductions[valid], np.maximum(age[valid], 0), risk[valid], invalid
+
+
+def _csv_shard(path, start, end, columns, year, chunk_size):
+    # A shard owns every line that starts inside its byte range
+    aggregate = empty_aggregate()
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()  # finish the line that straddles the boundary; it belongs to the previous shard
+        while f.tell() < end:
+            block = f.read(min(end - f.tell(), chunk_size * 32))
+            if not block.endswith(b"\n"):
+                block += f.readline()
+            rows = csv.reader(io.StringIO(block.decode("utf-8")))
+            income, deductions, age, risk, invalid = _csv_columns(list(rows), columns)
+            part = evaluate_columns(income, deductions, age, risk, year=year)
+            part["profiles"] += invalid
+            part["invalid"] = invalid
+            merge_aggregates(aggregate, part)
+    return aggregate
+
+
+def _run_shard(shard):
+    kind, args = shard
+    return _synthetic_shard(*args) if kind == "synthetic" else _csv_shard(*args)
+
+
+def synthetic_shards(count, seed=0, shard_size=DEFAULT_SHARD_SIZE, year=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    return [("synthetic", (seed, index, min(shard_size, count - start), year, chunk_size))
+            for index, start in enumerate(range(0, count, shard_size))]
+
+
+def csv_shards(path, shard_bytes=DEFAULT_SHARD_BYTES, year=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Splits a CSV file into byte ranges; only the header is read here, workers parse their own ranges."""
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        data_start = f.tell()
+    columns = {name.strip().lower(): i for i, name in enumerate(header)}
+    if "income" not in columns:
+        raise ValueError(f"{path} has no 'income' column")
+    size = os.path.getsize(path)
+    return [("csv", (path, start, min(start + shard_bytes, size), columns, year, chunk_size))
+            for start in range(data_start, size, shard_bytes)]
+
+
+def run_shards(shards, workers=None):
+    """Runs shards on a process pool (in-process when workers == 1) and merges their aggregates."""
+    total = empty_aggregate()
+    if workers == 1:
+        for shard in shards:
+            merge_aggregates(total, _run_shard(shard))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(_run_shard, shards):
+            merge_aggregates(total, part)
+    return total
+
+
+def report(aggregate):
+    """Turns a merged aggregate into shares and averages."""
+    profiles = aggregate["profiles"] - aggregate["invalid"]
+    allocated = aggregate["allocated"]
+
+    def shares(counts, whole):
+        return {label: count / whole if whole else 0.0 for label, count in counts.items() if count}
+
+    return {
+        "profiles": profiles,
+        "invalid": aggregate["invalid"],
+        "regime_split": shares(aggregate["regimes"], profiles),
+        "bracket_distribution": shares(aggregate["brackets"], profiles),
+        "risk_mix": shares(aggregate["risk"], sum(aggregate["risk"].values())),
+        "allocation_mix": {asset: total / allocated if allocated else 0.0
+                           for asset, total in aggregate["allocation_sum"].items()},
+        "avg_tax": aggregate["tax_sum"] / profiles if profiles else 0.0,
+        "avg_regime_savings": aggregate["savings_sum"] / profiles if profiles else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate Finley's tax and allocation logic over a whole population.")
+    parser.add_argument("input", nargs="?", help="CSV of profiles (omit with --synthetic)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic profiles instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="synthetic profiles per task")
+    parser.add_argument("--year", default=None, help="tax year (default: FINLEY_TAX_YEAR or the rules' default)")
+    args = parser.parse_args(argv)
+    if (args.input is None) == (args.synthetic is None):
+        parser.error("give either an input CSV or --synthetic N")
+
+    year = get_tax_rules(args.year).year  # resolve once so every worker uses the same rules
+    if args.synthetic is not None:
+        shards = synthetic_shards(args.synthetic, args.seed, args.shard_size, year)
+    else:
+        shards = csv_shards(args.input, year=year)
+    workers = args.workers or os.cpu_count()
+    started = time.perf_counter()
+    aggregate = run_shards(shards, workers)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "tax_year": year,
+        "workers": workers,
+        "shards": len(shards),
+        "elapsed_s": elapsed,
+        "profiles_per_s": aggregate["profiles"] / elapsed if elapsed else 0.0,
+        **report(aggregate),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#deterministic portfolio allocation used by the Investa agents
+import numpy as np
+
+RISK_LEVELS = ("low", "medium", "high")
+
+ASSET_CLASSES = ("equity", "debt", "hybrid", "international_equity", "alternatives")
+
+
+def recommend_allocation(age, risk_tolerance):
+    """Returns the suggested allocation in percent for every asset class."""
+    allocation = dict.fromkeys(ASSET_CLASSES, 0)
+    if risk_tolerance == "low":
+        allocation.update(debt=60, hybrid=20, equity=20)
+    elif risk_tolerance == "medium":
+        equity = min(80, 100 - age)
+        allocation.update(equity=equity, debt=100 - equity)
+    elif risk_tolerance == "high":
+        allocation.update(equity=70, international_equity=20, alternatives=10)
+    else:
+        raise ValueError(f"Unknown risk tolerance: {risk_tolerance!r}")
+    return allocation
+
+
+# Fixed allocations by risk level, as rows over ASSET_CLASSES; medium is age-dependent and filled in per record
+_FIXED_ALLOCATIONS = (
+    (20, 60, 20, 0, 0),
+    (0, 0, 0, 0, 0),
+    (70, 0, 0, 20, 10),
+)
+
+
+def recommend_allocation_batch(age, risk):
+    """Vectorized recommend_allocation() for arrays of ages and risk levels.
+
+    `risk` holds indices into RISK_LEVELS. Returns an (n, len(ASSET_CLASSES))
+    integer array of percentages, one row per profile, columns in ASSET_CLASSES order.
+    """
+    age = np.asarray(age)
+    risk = np.asarray(risk)
+    if risk.size and (risk.min() < 0 or risk.max() >= len(RISK_LEVELS)):
+        raise ValueError("Risk levels must be indices into RISK_LEVELS")
+    allocation = np.array(_FIXED_ALLOCATIONS, dtype=np.int64)[risk]
+    medium = risk == RISK_LEVELS.index("medium")
+    equity = np.minimum(80, 100 - age[medium])
+    allocation[medium, ASSET_CLASSES.index("equity")] = equity
+    allocation[medium, ASSET_CLASSES.index("debt")] = 100 - equity
+    return allocation
@@ -0,0 +1,72 @@
+#regime-optimization solver: break-even deductions and old/new regime comparison curves
+#works analytically on the compiled piecewise-linear rule tables, so sweeps cost one vectorized pass
+#usage: python regime_solver.py 1200000 1800000 ...   (year from FINLEY_TAX_YEAR)
+import sys
+
+import numpy as np
+
+from tax_engine import OLD_REGIME, get_tax_rules
+
+
+def _max_old_taxable(target_tax, rules):
+    """Largest old-regime taxable income whose liability (after cess and rounding) is at most target_tax."""
+    table = rules.old
+    # round(x) <= t holds for x up to t + 0.5, so invert the pre-cess tax function at that point
+    pre_cess = (target_tax + 0.5) / rules.cess_multiplier
+    # Only segments that actually charge tax can be inverted
+    taxed = table.rates_array > 0
+    starts = table.starts_array[taxed]
+    cumulative = table.cumulative_array[taxed]
+    rates = table.rates_array[taxed]
+    ends = np.append(table.starts_array[1:], np.inf)[taxed]
+    index = np.maximum(np.searchsorted(cumulative, pre_cess, side="right") - 1, 0)
+    # A target that falls in a jump between segments is met at the end of the lower one
+    taxable = np.minimum(starts[index] + (pre_cess - cumulative[index]) / rates[index], ends[index])
+    # Everything up to the 87A limit is tax free, so that much is always affordable
+    return np.maximum(taxable, table.rebate_limit)
+
+
+def breakeven_deductions(income, year=None):
+    """Smallest whole-rupee deduction at which the old regime is recommended, for each income.
+
+    The old regime wins when its liability is no higher than the new regime's,
+    and more deductions never raise old-regime tax, so any deduction at or
+    above the returned amount keeps the old regime ahead.
+    """
+    rules = get_tax_rules(year)
+    income = np.asarray(income, dtype=np.float64)
+    new_tax = rules.compute_batch(income, 0.0)["new_regime_tax"]
+    deductions = np.maximum(0.0, np.ceil(income - rules.old.standard_deduction - _max_old_taxable(new_tax, rules)))
+    # Rounding ties at the boundary can leave the estimate one rupee short; nudge those up
+    for _ in range(2):
+        short = rules.compute_batch(income, deductions)["recommended_regime"] != OLD_REGIME
+        if not short.any():
+            break
+        deductions = np.where(short, deductions + 1, deductions)
+    return deductions
+
+
+def regime_curves(incomes, deductions, year=None):
+    """Evaluates both regimes over the grid of incomes (rows) x deductions (columns).
+
+    Returns compute_tax_batch() results as 2-D arrays, plus `savings`: how much
+    less tax the recommended regime charges than the other one.
+    """
+    incomes = np.asarray(incomes, dtype=np.float64)
+    deductions = np.asarray(deductions, dtype=np.float64)
+    curves = get_tax_rules(year).compute_batch(incomes[:, None], deductions[None, :])
+    curves["savings"] = np.abs(curves["old_regime_tax"] - curves["new_regime_tax"])
+    return curves
+
+
+def main(argv=None):
+    incomes = [float(arg) for arg in (sys.argv[1:] if argv is None else argv)]
+    if not incomes:
+        print("usage: python regime_solver.py INCOME [INCOME ...]")
+        return
+    for income, breakeven in zip(incomes, breakeven_deductions(incomes)):
+        print(f"Income ₹{income:,.0f}: the Old Regime wins with deductions of ₹{breakeven:,.0f} or more")
+
+
+if __name__ == "__main__":
+    main()
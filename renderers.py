@@ -0,0 +1,257 @@
+#output renderers for agent messages
+#the renderer is chosen per deployment: FINLEY_RENDERER=tty|plain|events, FINLEY_TYPING_DELAY=<seconds>
+import json
+import os
+import re
+import sys
+import textwrap
+import time
+
+from tracing import span
+
+# ANSI color codes for better terminal output
+class colors:
+    BLUE = '\033[94m'
+    GREEN = '\033[92m'
+    PURPLE = '\033[95m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+DEFAULT_TYPING_DELAY = 1.5
+WRAP_WIDTH = 80
+
+_ANSI_ESCAPE = re.compile(r'\033\[[0-9;]*m')
+
+
+def strip_colors(text):
+    """Removes ANSI color codes from a piece of text."""
+    return _ANSI_ESCAPE.sub('', text)
+
+
+class LineWrapper:
+    """Incrementally wraps streamed text into lines of at most `width` characters.
+
+    Like textwrap.fill, runs of whitespace separate words and words longer
+    than a line are broken. A word is only placed once the whitespace after
+    it has arrived, so a chunk boundary never splits a word.
+    """
+
+    def __init__(self, width=WRAP_WIDTH):
+        if width < 1:
+            raise ValueError("width must be at least 1")
+        self.width = width
+        self._line = ""
+        self._partial = ""
+
+    def _place(self, word):
+        lines = []
+        if len(word) > self.width:
+            # As textwrap does, a long word first fills whatever is left of the current line
+            if self._line:
+                space_left = self.width - len(self._line) - 1
+                if space_left > 0:
+                    self._line += " " + word[:space_left]
+                    word = word[space_left:]
+                lines.append(self._line)
+            while len(word) > self.width:
+                lines.append(word[:self.width])
+                word = word[self.width:]
+            self._line = word
+            return lines
+        if not self._line:
+            self._line = word
+        elif len(self._line) + 1 + len(word) <= self.width:
+            self._line += " " + word
+        else:
+            lines.append(self._line)
+            self._line = word
+        return lines
+
+    def feed(self, text):
+        """Adds a chunk of text and returns the lines it completed."""
+        text = self._partial + text
+        words = text.split()
+        if words and not text[-1].isspace():
+            self._partial = words.pop()
+        else:
+            self._partial = ""
+        lines = []
+        for word in words:
+            lines.extend(self._place(word))
+        return lines
+
+    def flush(self):
+        """Returns the remaining lines once the stream has ended."""
+        lines = self._place(self._partial) if self._partial else []
+        self._partial = ""
+        if self._line:
+            lines.append(self._line)
+            self._line = ""
+        return lines
+
+
+class Renderer:
+    """Base class for the ways agent output can be presented."""
+
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    @property
+    def stream(self):
+        # Resolved lazily so redirections of sys.stdout are honoured
+        return self._stream or sys.stdout
+
+    def message(self, agent_name, message, color, typing_delay=None):
+        """Presents one message from an agent."""
+        raise NotImplementedError("Each renderer must implement its own message method.")
+
+    def status(self, text, color=colors.BLUE):
+        """Presents a transient status line, e.g. while waiting on the model."""
+        raise NotImplementedError("Each renderer must implement its own status method.")
+
+    def stream_message(self, agent_name, chunks, color):
+        """Presents a message whose text arrives as an iterable of chunks."""
+        self.message(agent_name, "".join(chunks), color, typing_delay=0)
+
+    def pause(self, seconds):
+        """A cosmetic pause; renderers that are not meant for humans never block."""
+
+    def prompt(self, text):
+        """Asks the user for one line of input and returns it."""
+        return self._read(f"> {strip_colors(text)}")
+
+    def _read(self, prompt):
+        if self._stream is None:
+            return input(prompt)
+        # input() always writes its prompt to sys.stdout, so a redirected renderer writes it itself
+        self.stream.write(prompt)
+        self.stream.flush()
+        return input()
+
+
+class TTYRenderer(Renderer):
+    """Colored, wrapped output for an interactive terminal with an optional typing delay.
+
+    typing_delay caps every cosmetic pause, so a deployment that sets it to 0
+    never sleeps even where callers ask for a longer delay.
+    """
+
+    def __init__(self, typing_delay=DEFAULT_TYPING_DELAY, width=WRAP_WIDTH, stream=None):
+        super().__init__(stream)
+        self.typing_delay = typing_delay
+        self.width = width
+
+    def message(self, agent_name, message, color, typing_delay=None):
+        print(f"\n{color}{colors.BOLD}{agent_name}:{colors.ENDC}{color}", file=self.stream)
+        # Wrap text for better readability in terminal
+        wrapped_message = textwrap.fill(message, width=self.width)
+        print(wrapped_message + colors.ENDC, file=self.stream)
+        self.pause(self.typing_delay if typing_delay is None else typing_delay)
+
+    def stream_message(self, agent_name, chunks, color):
+        print(f"\n{color}{colors.BOLD}{agent_name}:{colors.ENDC}{color}", file=self.stream, flush=True)
+        wrapper = LineWrapper(self.width)
+        for chunk in chunks:
+            for line in wrapper.feed(chunk):
+                print(line, file=self.stream, flush=True)
+        for line in wrapper.flush():
+            print(line, file=self.stream)
+        print(colors.ENDC, end="", file=self.stream, flush=True)
+
+    def status(self, text, color=colors.BLUE):
+        print(f"{color}{text}{colors.ENDC}", file=self.stream)
+
+    def prompt(self, text):
+        return self._read(f"{colors.YELLOW}> {text}{colors.ENDC}")
+
+    def pause(self, seconds):
+        seconds = min(seconds, self.typing_delay)
+        if seconds > 0:
+            with span("render.pause", seconds=seconds):
+                time.sleep(seconds)
+
+
+class PlainRenderer(Renderer):
+    """Uncolored, wrapped output with no delays, for logs and batch runs."""
+
+    def __init__(self, width=WRAP_WIDTH, stream=None):
+        super().__init__(stream)
+        self.width = width
+
+    def message(self, agent_name, message, color, typing_delay=None):
+        print(f"\n{agent_name}:", file=self.stream)
+        print(textwrap.fill(strip_colors(message), width=self.width), file=self.stream)
+
+    def stream_message(self, agent_name, chunks, color):
+        print(f"\n{agent_name}:", file=self.stream, flush=True)
+        wrapper = LineWrapper(self.width)
+        for chunk in chunks:
+            for line in wrapper.feed(strip_colors(chunk)):
+                print(line, file=self.stream, flush=True)
+        for line in wrapper.flush():
+            print(line, file=self.stream, flush=True)
+
+    def status(self, text, color=colors.BLUE):
+        print(strip_colors(text), file=self.stream)
+
+
+class EventRenderer(Renderer):
+    """One JSON object per line for machine consumers; never wraps or sleeps."""
+
+    def _emit(self, event):
+        event["ts"] = time.time()
+        self.stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def message(self, agent_name, message, color, typing_delay=None):
+        self._emit({"type": "message", "agent": agent_name, "text": strip_colors(message).strip()})
+
+    def stream_message(self, agent_name, chunks, color):
+        for chunk in chunks:
+            self._emit({"type": "chunk", "agent": agent_name, "text": strip_colors(chunk)})
+        self._emit({"type": "message_end", "agent": agent_name})
+
+    def status(self, text, color=colors.BLUE):
+        self._emit({"type": "status", "text": strip_colors(text).strip()})
+
+    def prompt(self, text):
+        self._emit({"type": "prompt", "text": strip_colors(text).strip()})
+        return input()
+
+
+RENDERERS = {
+    "tty": TTYRenderer,
+    "plain": PlainRenderer,
+    "events": EventRenderer,
+}
+
+_renderer = None
+
+
+def make_renderer(kind=None, typing_delay=None, stream=None):
+    """Builds a renderer, defaulting to the FINLEY_RENDERER / FINLEY_TYPING_DELAY settings."""
+    kind = (kind or os.getenv("FINLEY_RENDERER") or "tty").lower()
+    if kind not in RENDERERS:
+        raise ValueError(f"Unknown renderer {kind!r}; choose from {', '.join(RENDERERS)}")
+    if kind != "tty":
+        return RENDERERS[kind](stream=stream)
+    if typing_delay is None:
+        typing_delay = float(os.getenv("FINLEY_TYPING_DELAY", DEFAULT_TYPING_DELAY))
+    return TTYRenderer(typing_delay=typing_delay, stream=stream)
+
+
+def get_renderer():
+    """Returns the process-wide renderer, creating it from the environment on first use."""
+    global _renderer
+    if _renderer is None:
+        _renderer = make_renderer()
+    return _renderer
+
+
+def set_renderer(renderer):
+    """Replaces the process-wide renderer and returns the previous one."""
+    global _renderer
+    previous, _renderer = _renderer, renderer
+    return previous
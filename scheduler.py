@@ -0,0 +1,314 @@
+#rate-limit-aware scheduler in front of the model pool
+#token-bucket rate limiting, bounded concurrency with a bounded wait queue, exponential backoff with
+#jitter on retryable provider errors (429/5xx), and merging of identical in-flight prompts
+#configured with FINLEY_RATE_LIMIT=<calls/s>, FINLEY_RATE_BURST=<n>, FINLEY_MAX_CONCURRENCY=<n>,
+#FINLEY_MAX_QUEUE=<n>, FINLEY_MAX_RETRIES=<n>
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from model_pool import DEFAULT_POOL_SIZE, TIMING_WINDOW, get_model_pool
+from tracing import span
+
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+RETRYABLE_STATUS = frozenset((429, 500, 502, 503, 504))
+
+
+class SchedulerBusy(Exception):
+    """Raised when the wait queue is full and a call is rejected instead of queued."""
+
+
+def status_code(exc):
+    """The HTTP status carried by a provider error, if any (google.api_core errors expose it as `code`)."""
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_retryable(exc):
+    """True for rate-limit and transient server errors that are worth retrying."""
+    return status_code(exc) in RETRYABLE_STATUS
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `burst` calls.
+
+    acquire() reserves a token and sleeps until it is due, so waiting callers
+    are served in the order they arrived.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Takes a token if one is available right now; never waits."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """Takes a token, waiting for it if needed; returns the seconds waited."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if timeout is not None and wait > timeout:
+                self._tokens += 1
+                raise TimeoutError(f"No rate-limit token within {timeout}s")
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+class Scheduler:
+    """Schedules calls to a model pool under a rate limit and a concurrency bound.
+
+    At most `max_concurrency` calls run at once; up to `max_queue` more wait
+    for a slot and any beyond that are rejected with SchedulerBusy. Retryable
+    errors are retried up to `max_retries` times with full-jitter exponential
+    backoff. Concurrent generate() calls with the same prompt share one
+    request. The pool defaults to get_model_pool(model_name), looked up per
+    call so a pool installed later with set_model_pool() is honoured.
+    """
+
+    def __init__(self, model_name, pool=None, rate=None, burst=None, max_concurrency=DEFAULT_POOL_SIZE,
+                 max_queue=DEFAULT_MAX_QUEUE, max_retries=DEFAULT_MAX_RETRIES, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, sleep=time.sleep, rng=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.model_name = model_name
+        self._pool = pool
+        self.bucket = TokenBucket(rate, burst, sleep=sleep) if rate else None
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = {}  # merge key -> Future of the request serving it
+        self._queued = 0
+        self._running = 0
+        self.max_queue_depth = 0
+        self.submitted = 0
+        self.merged = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self._total_wait_time = 0.0
+        self._waits = deque(maxlen=TIMING_WINDOW)
+
+    @property
+    def pool(self):
+        return self._pool if self._pool is not None else get_model_pool(self.model_name)
+
+    def backoff(self, attempt, exc=None):
+        """Seconds to wait before retry number `attempt` (0-based): full jitter, at least any Retry-After."""
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = getattr(exc, "retry_after", None)
+        return max(delay, retry_after) if retry_after else delay
+
+    def _take_slot(self, timeout):
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise SchedulerBusy(f"{self._queued} calls are already waiting for the model")
+            self._queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        try:
+            if not self._slots.acquire(timeout=timeout):
+                raise TimeoutError(f"No model slot became available within {timeout}s")
+            try:
+                if self.bucket is not None:
+                    self.bucket.acquire(timeout)
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            with self._lock:
+                self._queued -= 1
+        with self._lock:
+            self._running += 1
+
+    def _release_slot(self):
+        with self._lock:
+            self._running -= 1
+        self._slots.release()
+
+    def _record_wait(self, waited):
+        with self._lock:
+            self._total_wait_time += waited
+            self._waits.append(waited)
+
+    def _run(self, call, trace, timeout):
+        """Runs `call(pool)` in a slot, retrying retryable errors with backoff."""
+        submitted = time.perf_counter()
+        attempt = 0
+        while True:
+            self._take_slot(timeout)
+            if attempt == 0:
+                waited = time.perf_counter() - submitted
+                self._record_wait(waited)
+                trace.set(wait_ms=waited * 1000)
+            try:
+                return call(self.pool)
+            except Exception as e:
+                if status_code(e) == 429:
+                    with self._lock:
+                        self.rate_limited += 1
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt, e)
+            finally:
+                self._release_slot()
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            trace.set(retries=attempt)
+            self._sleep(delay)
+
+    def generate(self, prompt, timeout=None, **kwargs):
+        """Scheduled ModelPool.generate(); identical concurrent calls share one request."""
+        key = (prompt, tuple(sorted(kwargs.items())))
+        with self._lock:
+            self.submitted += 1
+            shared = self._in_flight.get(key)
+            if shared is None:
+                future = self._in_flight[key] = Future()
+            else:
+                self.merged += 1
+        if shared is not None:
+            with span("model.scheduled", model=self.model_name, merged=True):
+                return shared.result(timeout)
+
+        try:
+            with span("model.scheduled", model=self.model_name, merged=False, retries=0) as trace:
+                response = self._run(lambda pool: pool.generate(prompt, timeout, **kwargs), trace, timeout)
+        except BaseException as e:
+            with self._lock:
+                self.failed += 1
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self.completed += 1
+            del self._in_flight[key]
+        future.set_result(response)
+        return response
+
+    def stream(self, prompt, timeout=None, **kwargs):
+        """Scheduled ModelPool.stream(); retries only until the first chunk has arrived.
+
+        Streams are never merged, since each caller consumes its own chunks.
+        """
+        with self._lock:
+            self.submitted += 1
+        with span("model.scheduled", model=self.model_name, merged=False, retries=0, stream=True) as trace:
+            def first_chunk(pool):
+                chunks = pool.stream(prompt, timeout, **kwargs)
+                try:
+                    return chunks, next(chunks)
+                except StopIteration:
+                    return chunks, None
+
+            try:
+                # The slot is held until the first chunk arrives; the pool handle until the stream ends
+                chunks, first = self._run(first_chunk, trace, timeout)
+                if first is not None:
+                    yield first
+                    yield from chunks
+            except BaseException:
+                with self._lock:
+                    self.failed += 1
+                raise
+            with self._lock:
+                self.completed += 1
+
+    async def agenerate(self, prompt, timeout=None, **kwargs):
+        """Async variant of generate(); the blocking call runs on a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, timeout, **kwargs)
+
+    def stats(self):
+        """Returns queue depth, wait times (seconds) and retry/merge counters."""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "rate": self.bucket.rate if self.bucket is not None else None,
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "queue_depth": self._queued,
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "merged": self.merged,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "avg_wait": self._total_wait_time / len(self._waits) if self._waits else 0.0,
+                "p99_wait": waits[min(len(waits) - 1, int(0.99 * len(waits)))] if waits else 0.0,
+                "max_wait": waits[-1] if waits else 0.0,
+            }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model_name):
+    """Returns the process-wide scheduler for a model, built from the environment on first use."""
+    scheduler = _schedulers.get(model_name)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(model_name)
+            if scheduler is None:
+                rate = float(os.getenv("FINLEY_RATE_LIMIT", "0")) or None
+                burst = os.getenv("FINLEY_RATE_BURST")
+                scheduler = _schedulers[model_name] = Scheduler(
+                    model_name,
+                    rate=rate,
+                    burst=float(burst) if burst else None,
+                    max_concurrency=int(os.getenv("FINLEY_MAX_CONCURRENCY", os.getenv("FINLEY_MODEL_POOL_SIZE", DEFAULT_POOL_SIZE))),
+                    max_queue=int(os.getenv("FINLEY_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+                    max_retries=int(os.getenv("FINLEY_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                )
+    return scheduler
+
+
+def set_scheduler(scheduler):
+    """Installs a scheduler for its model name and returns the previous one."""
+    with _schedulers_lock:
+        previous = _schedulers.get(scheduler.model_name)
+        _schedulers[scheduler.model_name] = scheduler
+    return previous
@@ -0,0 +1,402 @@
+#HTTP/JSON server mode: exposes Finley's agents to many concurrent users
+#usage: python server.py [--host 127.0.0.1] [--port 8080] [--workers N]
+#
+#  POST /tax      {"income", "deductions"} or {"profiles": [...]}  -> old/new regime liability
+#  POST /invest   {"age", "risk_tolerance", "tax_bracket"?}         -> allocation + Investa's advice
+#                 add "monthly_contribution" (and "step_up", "retirement_age", "goal") for a Monte Carlo corpus projection
+#  POST /itr      {"form": "ITR-1" | "ITR-2" | "unsure"}            -> Filer's guidance
+#  POST /plan     {"income", "deductions", "age", "risk_tolerance"} -> holistic plan
+#                 add "session_id" to remember answers, so later requests may omit them
+#                 add "stream": true for chunked NDJSON events with the advice line by line ("width": 20-200)
+#  GET  /health, GET /stats
+#
+#tax computation runs on a process pool; model calls run on the async I/O path
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from app import Filer
+from app2 import MODEL_NAME, FinancialContext, Investa, Taxwell, open_session_store
+from ai_cache import get_response_cache
+from batch import parse_age, parse_profile
+from model_pool import get_model_pool
+from montecarlo import DEFAULT_RETIREMENT_AGE, project
+from portfolio import recommend_allocation
+from renderers import WRAP_WIDTH, LineWrapper, make_renderer, set_renderer
+from scheduler import get_scheduler
+from tax_engine import compute_tax, compute_tax_batch
+from tracing import get_tracer, span
+
+PROFILE_FIELDS = ("income", "deductions", "age", "risk_tolerance")
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH_PROFILES = 10000
+DEFAULT_IO_THREADS = 64
+MIN_STREAM_WIDTH, MAX_STREAM_WIDTH = 20, 200
+PROJECTION_PATHS = 20000  # fewer paths than the CLI's default keep a projection to a fraction of a core-second
+MAX_MONTHLY_CONTRIBUTION = 1e9
+MAX_STEP_UP = 1.0  # contributions may at most double every year
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """An error that is reported to the client with the given status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _batch_tax(incomes, deductions):
+    """Runs compute_tax_batch in a worker and returns plain lists so the result pickles cheaply."""
+    tax = compute_tax_batch(incomes, deductions)
+    return {key: values.tolist() for key, values in tax.items()}
+
+
+def _context_from(payload):
+    """Builds a fresh FinancialContext for one request."""
+    profile = parse_profile(payload)
+    context = FinancialContext()
+    context.income = profile["income"]
+    context.deductions = profile["deductions"]
+    context.age = profile["age"]
+    context.risk_tolerance = profile["risk_tolerance"]
+    return context
+
+
+class FinleyServer:
+    """Serves the Finley agents over HTTP/1.1 with keep-alive."""
+
+    def __init__(self, workers=None, io_threads=DEFAULT_IO_THREADS, sessions=None):
+        self.sessions = sessions
+        self.cpu_pool = ProcessPoolExecutor(max_workers=workers)
+        self.io_pool = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="finley-io")
+        self.tax_agent = Taxwell()
+        self.investment_agent = Investa()
+        self.itr_agent = Filer()
+        self.routes = {
+            ("POST", "/tax"): self.handle_tax,
+            ("POST", "/invest"): self.handle_invest,
+            ("POST", "/itr"): self.handle_itr,
+            ("POST", "/plan"): self.handle_plan,
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/stats"): self.handle_stats,
+        }
+        self.requests = {}
+        self.in_flight = 0
+        self.started = time.time()
+
+    # --- Endpoint handlers ---
+
+    async def _compute_tax(self, income, deductions):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, compute_tax, income, deductions)
+
+    async def handle_tax(self, payload):
+        if "profiles" in payload:
+            profiles = payload["profiles"]
+            if not isinstance(profiles, list) or len(profiles) > MAX_BATCH_PROFILES:
+                raise HTTPError(400, f"'profiles' must be a list of at most {MAX_BATCH_PROFILES} records")
+            parsed = []
+            for index, profile in enumerate(profiles):
+                if not isinstance(profile, dict):
+                    raise HTTPError(400, f"profiles[{index}] must be an object")
+                try:
+                    parsed.append(parse_profile(profile))
+                except ValueError as e:
+                    raise HTTPError(400, f"profiles[{index}]: {e}")
+            loop = asyncio.get_running_loop()
+            tax = await loop.run_in_executor(self.cpu_pool, _batch_tax,
+                                             [p["income"] for p in parsed], [p["deductions"] for p in parsed])
+            return {"results": [dict(zip(tax, row)) for row in zip(*tax.values())]}
+        context = _context_from(payload)
+        return await self._compute_tax(context.income, context.deductions)
+
+    async def handle_invest(self, payload):
+        context = FinancialContext()
+        if "age" not in payload or "risk_tolerance" not in payload:
+            raise HTTPError(400, "'age' (whole number) and 'risk_tolerance' are required")
+        try:
+            context.age = parse_age(payload["age"])
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        context.risk_tolerance = str(payload["risk_tolerance"]).lower()
+        try:
+            allocation = recommend_allocation(context.age, context.risk_tolerance)
+        except ValueError:
+            raise HTTPError(400, "risk_tolerance must be 'low', 'medium' or 'high'")
+
+        projection = None
+        if "monthly_contribution" in payload:
+            projection = self._project(allocation, context.age, payload)
+
+        if "tax_bracket" in payload:
+            context.tax_bracket = str(payload["tax_bracket"])
+        elif "income" in payload:
+            profile = parse_profile(payload)
+            self.tax_agent.analyze(context, await self._compute_tax(profile["income"], profile["deductions"]))
+        response = {"tax_bracket": context.tax_bracket, "allocation": allocation,
+                    "advice": await self.investment_agent.advise(context)}
+        if projection is not None:
+            with span("invest.projection"):
+                response["projection"] = await projection
+        return response
+
+    def _project(self, allocation, age, payload):
+        """Validates the projection fields and starts the simulation on the process pool."""
+        try:
+            monthly = float(payload["monthly_contribution"])
+            step_up = float(payload.get("step_up", 0.0))
+            retirement_age = int(payload.get("retirement_age", DEFAULT_RETIREMENT_AGE))
+            goal = float(payload["goal"]) if payload.get("goal") is not None else None
+        except (TypeError, ValueError, OverflowError):
+            raise HTTPError(400, "'monthly_contribution', 'step_up', 'retirement_age' and 'goal' must be numbers")
+        if not all(math.isfinite(value) for value in (monthly, step_up, goal or 0.0)):
+            raise HTTPError(400, "'monthly_contribution', 'step_up' and 'goal' must be finite numbers")
+        if not 0 <= monthly <= MAX_MONTHLY_CONTRIBUTION:
+            raise HTTPError(400, f"'monthly_contribution' must be between 0 and {MAX_MONTHLY_CONTRIBUTION:,.0f}")
+        if not 0 <= step_up <= MAX_STEP_UP:
+            raise HTTPError(400, f"'step_up' must be between 0 and {MAX_STEP_UP}")
+        if not age < retirement_age <= 100:
+            raise HTTPError(400, "'retirement_age' must be above age and at most 100")
+        # Runs while the advice is being generated
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.cpu_pool, partial(project, allocation, age, monthly, retirement_age,
+                                                           step_up, paths=PROJECTION_PATHS, goal=goal))
+
+    async def handle_itr(self, payload):
+        guide_text = self.itr_agent.guidance(str(payload.get("form", "")))
+        if guide_text is None:
+            raise HTTPError(400, "'form' must be one of 'ITR-1', 'ITR-2' or 'unsure'")
+        return {"guidance": guide_text}
+
+    async def handle_plan(self, payload):
+        session_id = payload.get("session_id")
+        if session_id is not None and self.sessions is not None:
+            saved = self.sessions.load(str(session_id))
+            if saved is not None:
+                # Answers sent with this request win over the ones remembered from the session
+                remembered = {field: getattr(saved, field) for field in PROFILE_FIELDS if getattr(saved, field) is not None}
+                payload = {**remembered, **payload}
+        context = _context_from(payload)
+        if context.age is None or context.risk_tolerance is None:
+            raise HTTPError(400, "'age' and 'risk_tolerance' are required for a holistic plan")
+        width = payload.get("width", WRAP_WIDTH)
+        if payload.get("stream") and (type(width) is not int or not MIN_STREAM_WIDTH <= width <= MAX_STREAM_WIDTH):
+            raise HTTPError(400, f"'width' must be a whole number from {MIN_STREAM_WIDTH} to {MAX_STREAM_WIDTH}")
+        tax = self.tax_agent.analyze(context, await self._compute_tax(context.income, context.deductions))
+        if session_id is not None and self.sessions is not None:
+            self.sessions.save(str(session_id), context)
+        if payload.get("stream"):
+            return self._stream_plan(context, tax, width)
+        # advise() hands each blocking model call to the loop's I/O thread pool.
+        # Both agents only need fields that are already in the context, so their model calls run concurrently
+        tax_summary, investment_advice = await asyncio.gather(
+            self.tax_agent.advise(context),
+            self.investment_agent.advise(context),
+        )
+        return {
+            "tax": tax,
+            "allocation": recommend_allocation(context.age, context.risk_tolerance),
+            "advice": {self.tax_agent.name: tax_summary, self.investment_agent.name: investment_advice},
+        }
+
+    async def _stream_plan(self, context, tax, width):
+        """Yields the plan as events, forwarding each agent's advice line by line as the model produces it."""
+        yield {"type": "tax", "tax": tax, "allocation": recommend_allocation(context.age, context.risk_tolerance)}
+        # Both model streams start now; the second buffers while the first is forwarded
+        streams = [(agent, agent.stream_advice(context)) for agent in (self.tax_agent, self.investment_agent)]
+        loop = asyncio.get_running_loop()
+        for agent, stream in streams:
+            chunks = iter(stream)
+            wrapper = LineWrapper(width)
+            while True:
+                text = await loop.run_in_executor(None, next, chunks, None)
+                if text is None:
+                    break
+                for line in wrapper.feed(text):
+                    yield {"type": "line", "agent": agent.name, "text": line}
+            for line in wrapper.flush():
+                yield {"type": "line", "agent": agent.name, "text": line}
+            end = {"type": "end", "agent": agent.name, "first_chunk_s": stream.first_chunk_s, "total_s": stream.total_s}
+            if stream.problem is not None:
+                end["error"] = stream.problem
+            yield end
+
+    async def handle_health(self, payload):
+        return {"status": "ok"}
+
+    async def handle_stats(self, payload):
+        cache = get_response_cache()
+        tracer = get_tracer()
+        return {
+            "uptime": time.time() - self.started,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "model_pool": get_model_pool(MODEL_NAME).stats(),
+            "scheduler": get_scheduler(MODEL_NAME).stats(),
+            "cache": cache.stats() if cache is not None else None,
+            "trace": tracer.summary() if tracer is not None else None,
+        }
+
+    # --- HTTP plumbing ---
+
+    async def dispatch(self, method, path, body):
+        """Routes one request and returns (status, JSON-serialisable payload)."""
+        path = path.split("?", 1)[0]
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {"error": f"{method} is not allowed on {path}"}
+            return 404, {"error": f"No such endpoint: {path}"}
+        self.requests[path] = self.requests.get(path, 0) + 1
+        self.in_flight += 1
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+            with span("http.request", path=path):
+                return 200, await handler(payload)
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+        except HTTPError as e:
+            return e.status, {"error": e.message}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            print(f"Unhandled error on {path}: {e!r}", file=sys.stderr)
+            return 500, {"error": "Internal server error"}
+        finally:
+            self.in_flight -= 1
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length must be a whole number")
+        if length < 0:
+            raise HTTPError(400, "Content-Length cannot be negative")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return method, target, body, keep_alive
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def _write_stream(self, writer, events, keep_alive):
+        """Sends an async iterable of events as chunked newline-delimited JSON."""
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/x-ndjson; charset=utf-8\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1"))
+        try:
+            async for event in events:
+                line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+                writer.write(f"{len(line):x}\r\n".encode("latin-1") + line + b"\r\n")
+                await writer.drain()
+        except Exception as e:
+            print(f"Error while streaming: {e!r}", file=sys.stderr)
+            line = (json.dumps({"type": "error", "error": "Internal server error"}) + "\n").encode("utf-8")
+            writer.write(f"{len(line):x}\r\n".encode("latin-1") + line + b"\r\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._write_response(writer, e.status, {"error": e.message}, False)
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, payload = await self.dispatch(method, target, body)
+                if hasattr(payload, "__aiter__"):
+                    await self._write_stream(writer, payload, keep_alive)
+                else:
+                    self._write_response(writer, status, payload, keep_alive)
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Starts listening and returns the asyncio server."""
+        asyncio.get_running_loop().set_default_executor(self.io_pool)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self.cpu_pool.shutdown(cancel_futures=True)
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host, port, workers, io_threads):
+    server = FinleyServer(workers=workers, io_threads=io_threads, sessions=open_session_store())
+    listener = await server.start(host, port)
+    address = listener.sockets[0].getsockname()
+    print(f"Finley is serving on http://{address[0]}:{address[1]}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Finley's agents over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes for tax computation")
+    parser.add_argument("--io-threads", type=int, default=DEFAULT_IO_THREADS, help="threads for model calls")
+    args = parser.parse_args(argv)
+
+    # Agent status lines go to stderr as events; nothing should sleep or print to a terminal in server mode
+    set_renderer(make_renderer(os.getenv("FINLEY_RENDERER", "events"), stream=sys.stderr))
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.io_threads))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#persistent store of FinancialContext snapshots keyed by session id
+#idle sessions live on disk in SQLite as compact binary blobs; only a bounded LRU of recent ones stays in memory
+#configured with FINLEY_SESSION_DB=<sqlite file>
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_SESSION_DB = os.path.join(os.path.expanduser("~"), ".cache", "finley", "sessions.sqlite3")
+DEFAULT_CACHED_SESSIONS = 10000
+
+
+class SessionStore:
+    """Saves and restores contexts by session id.
+
+    Contexts are stored via their to_bytes() method and rebuilt with
+    `decode(data)`, so the store itself does not depend on the context class.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, decode, path=DEFAULT_SESSION_DB, max_cached=DEFAULT_CACHED_SESSIONS):
+        self._decode = decode
+        self.max_cached = max_cached
+        self._cache = OrderedDict()  # session id -> serialized bytes
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _remember(self, session_id, data):
+        self._cache[session_id] = data
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def load(self, session_id):
+        """Returns the stored context for a session, or None if there is none."""
+        with self._lock:
+            data = self._cache.get(session_id)
+            if data is not None:
+                self._cache.move_to_end(session_id)
+            else:
+                row = self._db.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is None:
+                    return None
+                data = row[0]
+                self._remember(session_id, data)
+        return self._decode(data)
+
+    def save(self, session_id, context):
+        """Stores a snapshot of the context for a session, replacing any earlier one."""
+        data = context.to_bytes()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated) VALUES (?, ?, ?)",
+                (session_id, data, time.time()),
+            )
+            self._remember(session_id, data)
+
+    def delete(self, session_id):
+        """Forgets a session."""
+        with self._lock:
+            self._cache.pop(session_id, None)
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
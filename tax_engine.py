@@ -0,0 +1,240 @@
+#table-driven tax engine shared by the Taxwell agents
+#the scalar path is used by the interactive apps, the batch path by payroll-sized runs
+#slabs, cess, rebates, standard deductions and surcharges live in tax_rules.json, one entry per financial year;
+#choose the year with FINLEY_TAX_YEAR=<e.g. FY2025-26> (FINLEY_TAX_RULES=<path> for another rules file)
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tax_rules.json")
+RULES_VERSION = 1
+
+OLD_REGIME = "Old Regime"
+NEW_REGIME = "New Regime"
+
+
+class RegimeTable:
+    """One regime's rules compiled into sorted breakpoints.
+
+    Each segment starts at a breakpoint and carries the pre-cess tax already
+    due at that point plus the marginal rate (surcharge included) beyond it,
+    so the liability for any taxable amount is one binary search and one
+    multiply-add. A segment applies to amounts strictly greater than its start.
+    """
+
+    def __init__(self, spec):
+        slabs = sorted(spec["slabs"])
+        if not slabs or slabs[0][0] != 0:
+            raise ValueError("The first slab must start at 0")
+        self.standard_deduction = spec.get("standard_deduction", 0)
+        rebate = spec.get("rebate") or {}
+        self.rebate_limit = rebate.get("limit", 0)
+        self.rebate_relief = bool(rebate.get("marginal_relief", False))
+
+        lowers = [slab[0] for slab in slabs]
+        rates = [slab[1] for slab in slabs]
+        slab_labels = [slab[2] for slab in slabs]
+        bases = [0.0]
+        for i in range(1, len(slabs)):
+            bases.append(bases[-1] + (lowers[i] - lowers[i - 1]) * rates[i - 1])
+
+        tiers = sorted(spec.get("surcharge", []))
+        thresholds = [tier[0] for tier in tiers]
+        surcharge_relief = bool(spec.get("surcharge_marginal_relief", False))
+
+        segments = []  # (start, pre-cess tax at start, marginal rate, label)
+        relief_anchor = None  # (threshold, tax at the threshold) while surcharge marginal relief applies
+        points = sorted(set(lowers) | set(thresholds))
+        for j, start in enumerate(points):
+            end = points[j + 1] if j + 1 < len(points) else float("inf")
+            i = bisect_right(lowers, start) - 1
+            tier = bisect_right(thresholds, start) - 1
+            factor = 1 + (tiers[tier][1] if tier >= 0 else 0.0)
+            rate = rates[i] * factor
+            plain = (bases[i] + (start - lowers[i]) * rates[i]) * factor
+            if surcharge_relief and start in thresholds:
+                # Tax just below the threshold; above it the extra tax may not exceed the extra income
+                relief_anchor = (start, _segment_value(segments[-1], start) if segments else 0.0)
+            if relief_anchor is not None:
+                relieved = relief_anchor[1] + (start - relief_anchor[0])
+                if relieved < plain:
+                    segments.append((start, relieved, 1.0, slab_labels[i]))
+                    crossing = start + (plain - relieved) / (1.0 - rate)
+                    if crossing >= end:
+                        continue
+                    start, plain = crossing, plain + (crossing - start) * rate
+                relief_anchor = None
+            segments.append((start, plain, rate, slab_labels[i]))
+
+        self.starts = tuple(float(s[0]) for s in segments)
+        self.cumulative = tuple(round(s[1], 2) for s in segments)
+        self.rates = tuple(s[2] for s in segments)
+        self.labels = tuple(s[3] for s in segments)
+        # Column copies for the vectorized path
+        self.starts_array = np.array(self.starts, dtype=np.float64)
+        self.cumulative_array = np.array(self.cumulative, dtype=np.float64)
+        self.rates_array = np.array(self.rates, dtype=np.float64)
+        self.labels_array = np.array(self.labels)
+
+    def gross(self, taxable):
+        """Pre-cess tax (surcharge included, before any rebate) and the segment index for one amount."""
+        index = max(bisect_left(self.starts, taxable) - 1, 0)
+        return self.cumulative[index] + (taxable - self.starts[index]) * self.rates[index], index
+
+    def gross_batch(self, taxable):
+        """Vectorized gross(): (pre-cess tax, segment index) arrays."""
+        # side='left' keeps the strict "greater than the breakpoint" semantics of the scalar path
+        index = np.maximum(np.searchsorted(self.starts_array, taxable, side="left") - 1, 0)
+        return self.cumulative_array[index] + (taxable - self.starts_array[index]) * self.rates_array[index], index
+
+
+def _segment_value(segment, x):
+    start, value, rate, _ = segment
+    return value + (x - start) * rate
+
+
+class TaxRules:
+    """The compiled rules of one financial year for both regimes."""
+
+    def __init__(self, year, spec):
+        self.year = year
+        self.cess_multiplier = 1 + spec["cess"]
+        self.old = RegimeTable(spec["regimes"]["old"])
+        self.new = RegimeTable(spec["regimes"]["new"])
+
+    def _regime_tax(self, table, taxable):
+        """Returns (tax after cess and rebate, rebate given, segment index) for one regime."""
+        pre_cess, index = table.gross(taxable)
+        tax = round(pre_cess * self.cess_multiplier)
+        if taxable <= table.rebate_limit:
+            return 0, tax, index
+        if table.rebate_relief and pre_cess > taxable - table.rebate_limit:
+            # Marginal relief: the tax may not exceed the income above the rebate limit
+            payable = round((taxable - table.rebate_limit) * self.cess_multiplier)
+            return payable, tax - payable, index
+        return tax, 0, index
+
+    def _regime_tax_batch(self, table, taxable):
+        pre_cess, index = table.gross_batch(taxable)
+        tax = np.round(pre_cess * self.cess_multiplier)
+        over_limit = taxable - table.rebate_limit
+        payable_pre_cess = np.where(over_limit > 0, pre_cess, 0.0)
+        if table.rebate_relief:
+            payable_pre_cess = np.minimum(payable_pre_cess, np.maximum(over_limit, 0.0))
+        payable = np.where(payable_pre_cess == pre_cess, tax, np.round(payable_pre_cess * self.cess_multiplier))
+        return payable, tax - payable, index
+
+    def compute(self, income, deductions):
+        """Computes the old/new regime liability for a single income/deduction profile."""
+        taxable_old = max(0, income - deductions - self.old.standard_deduction)
+        taxable_new = max(0, income - self.new.standard_deduction) if self.new.standard_deduction else income
+
+        old_regime_tax, rebate_old, old_index = self._regime_tax(self.old, taxable_old)
+        new_regime_tax, rebate_new, new_index = self._regime_tax(self.new, taxable_new)
+
+        if new_regime_tax < old_regime_tax:
+            recommended_regime = NEW_REGIME
+            tax_bracket = self.new.labels[new_index]
+        else:
+            recommended_regime = OLD_REGIME
+            tax_bracket = self.old.labels[old_index]
+
+        return {
+            "taxable_old": taxable_old,
+            "taxable_new": taxable_new,
+            "old_regime_tax": old_regime_tax,
+            "new_regime_tax": new_regime_tax,
+            "rebate_old": rebate_old,
+            "rebate_new": rebate_new,
+            "tax_bracket": tax_bracket,
+            "recommended_regime": recommended_regime,
+        }
+
+    def compute_batch(self, income, deductions):
+        """Vectorized compute(); see compute_tax_batch()."""
+        income = np.asarray(income, dtype=np.float64)
+        deductions = np.asarray(deductions, dtype=np.float64)
+        income, deductions = np.broadcast_arrays(income, deductions)
+
+        taxable_old = np.maximum(0.0, income - deductions - self.old.standard_deduction)
+        taxable_new = np.maximum(0.0, income - self.new.standard_deduction) if self.new.standard_deduction else income
+
+        old_regime_tax, rebate_old, old_index = self._regime_tax_batch(self.old, taxable_old)
+        new_regime_tax, rebate_new, new_index = self._regime_tax_batch(self.new, taxable_new)
+
+        new_wins = new_regime_tax < old_regime_tax
+        return {
+            "taxable_old": taxable_old,
+            "taxable_new": taxable_new,
+            "old_regime_tax": old_regime_tax.astype(np.int64),
+            "new_regime_tax": new_regime_tax.astype(np.int64),
+            "rebate_old": rebate_old.astype(np.int64),
+            "rebate_new": rebate_new.astype(np.int64),
+            "tax_bracket": np.where(new_wins, self.new.labels_array[new_index], self.old.labels_array[old_index]),
+            "recommended_regime": np.where(new_wins, NEW_REGIME, OLD_REGIME),
+        }
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """Reads a rules file and compiles every year in it; returns (default year, {year: TaxRules})."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != RULES_VERSION:
+        raise ValueError(f"Unsupported tax rules version {data.get('version')!r} in {path}")
+    return data["default_year"], {year: TaxRules(year, spec) for year, spec in data["years"].items()}
+
+
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def _loaded_rules():
+    # Compiled once per process (including each worker process of a batch run) and then reused;
+    # the default year is resolved at the same time so the hot path never consults the environment
+    global _rules
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                default_year, years = load_rules(os.getenv("FINLEY_TAX_RULES", DEFAULT_RULES_PATH))
+                _rules = (_select_year(years, os.getenv("FINLEY_TAX_YEAR") or default_year), years)
+    return _rules
+
+
+def _select_year(years, year):
+    if year not in years:
+        raise ValueError(f"Unknown tax year {year!r}; choose from {', '.join(years)}")
+    return years[year]
+
+
+def tax_years():
+    """The financial years the loaded rules cover."""
+    return tuple(_loaded_rules()[1])
+
+
+def get_tax_rules(year=None):
+    """Returns the compiled rules for a year, defaulting to FINLEY_TAX_YEAR or the file's default year."""
+    default, years = _rules or _loaded_rules()
+    return default if year is None else _select_year(years, year)
+
+
+def bracket_labels():
+    """Every bracket label any year's rules can produce."""
+    return tuple(sorted({label for rules in _loaded_rules()[1].values()
+                         for table in (rules.old, rules.new) for label in table.labels}))
+
+
+def compute_tax(income, deductions, year=None):
+    """Computes the old/new regime liability for a single income/deduction profile."""
+    return get_tax_rules(year).compute(income, deductions)
+
+
+def compute_tax_batch(income, deductions, year=None):
+    """Computes liabilities for whole arrays of profiles at once.
+
+    Returns a dict with the same keys as compute_tax(), each holding a NumPy
+    array aligned with the inputs. Values are identical to the scalar path.
+    """
+    return get_tax_rules(year).compute_batch(income, deductions)
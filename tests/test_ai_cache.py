@@ -0,0 +1,86 @@
+#ResponseCache: TTL expiry and LRU size limits in both tiers, driven by an injected clock
+import pytest
+
+from ai_cache import ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=[None, ":memory:"], ids=["memory", "sqlite"])
+def path(request):
+    return request.param
+
+
+def test_hit_miss_and_prompt_normalization(path):
+    cache = ResponseCache(path)
+    assert cache.get("m", "hello world") is None
+    cache.put("m", "hello world", "hi")
+    assert cache.get("m", "  hello \n world ") == "hi"
+    assert cache.get("other-model", "hello world") is None
+    assert cache_key("m", "a  b") == cache_key("m", "a b") != cache_key("n", "a b")
+    assert cache.misses == 2
+
+
+def test_entries_expire_after_ttl(path):
+    clock = Clock()
+    cache = ResponseCache(path, ttl=60, clock=clock)
+    cache.put("m", "p", "r")
+    clock.now += 60
+    assert cache.get("m", "p") == "r"
+    clock.now += 1
+    assert cache.get("m", "p") is None
+    # The expired entry was dropped, not just hidden
+    clock.now -= 61
+    assert cache.get("m", "p") is None
+
+
+def test_no_ttl_never_expires():
+    clock = Clock()
+    cache = ResponseCache(ttl=None, clock=clock)
+    cache.put("m", "p", "r")
+    clock.now += 10 ** 9
+    assert cache.get("m", "p") == "r"
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_memory_entries=2)
+    cache.put("m", "a", "1")
+    cache.put("m", "b", "2")
+    assert cache.get("m", "a") == "1"  # b is now the least recently used
+    cache.put("m", "c", "3")
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == "1"
+    assert cache.get("m", "c") == "3"
+    assert cache.memory_evictions == 1
+
+
+def test_disk_tier_evicts_least_recently_accessed_and_refills_memory():
+    clock = Clock()
+    cache = ResponseCache(":memory:", max_memory_entries=1, max_disk_entries=2, clock=clock)
+    cache.put("m", "a", "1")
+    clock.now += 1
+    cache.put("m", "b", "2")
+    clock.now += 1
+    assert cache.get("m", "a") == "1"  # served from disk, refreshing a's last access
+    assert cache.disk_hits == 1
+    clock.now += 1
+    cache.put("m", "c", "3")
+    assert cache.disk_evictions == 1
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == "1"
+    assert cache.get("m", "c") == "3"
+
+
+def test_disk_tier_drops_expired_rows_on_write():
+    clock = Clock()
+    cache = ResponseCache(":memory:", ttl=10, max_memory_entries=1, clock=clock)
+    cache.put("m", "old", "1")
+    clock.now += 11
+    cache.put("m", "new", "2")
+    assert cache.stats()["disk_entries"] == 1
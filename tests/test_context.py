@@ -0,0 +1,42 @@
+#FinancialContext's binary form must round-trip every field, including unset ones and labels outside the code tables
+import pytest
+
+from app2 import FinancialContext
+
+
+@pytest.mark.parametrize("context", [
+    FinancialContext(),
+    FinancialContext(income=1250000.5, deductions=150000.0, age=34, risk_tolerance="medium",
+                     tax_bracket="20%", recommended_regime="New Regime"),
+    FinancialContext(income=0.0, deductions=0.0, age=0, risk_tolerance="low"),
+    FinancialContext(income=900000.0, risk_tolerance="high"),
+    FinancialContext(deductions=50000.0, age=100),
+    # Labels not in the code tables are spelled out after the fixed-size head
+    FinancialContext(income=1e7, tax_bracket="30% + 10% surcharge", recommended_regime="Régime nouveau"),
+    FinancialContext(tax_bracket="", recommended_regime="x" * 254),
+], ids=["empty", "full", "zeros", "partial", "no-income", "spelled-out", "label-extremes"])
+def test_round_trip(context):
+    blob = context.to_bytes()
+    assert FinancialContext.from_bytes(blob) == context
+    assert FinancialContext.from_bytes(memoryview(blob)) == context
+
+
+def test_zero_is_not_confused_with_unset():
+    restored = FinancialContext.from_bytes(FinancialContext(income=0.0, age=0).to_bytes())
+    assert restored.income == 0.0 and restored.age == 0
+    assert restored.deductions is None and restored.risk_tolerance is None
+
+
+def test_known_labels_fit_in_the_fixed_head():
+    full = FinancialContext(income=1.0, deductions=2.0, age=3, risk_tolerance="high",
+                            tax_bracket="5% or less", recommended_regime="Old Regime")
+    assert len(full.to_bytes()) == len(FinancialContext().to_bytes()) == 22
+
+
+def test_rejects_overlong_labels_and_unknown_versions():
+    with pytest.raises(ValueError):
+        FinancialContext(tax_bracket="x" * 255).to_bytes()
+    blob = bytearray(FinancialContext().to_bytes())
+    blob[0] = 99
+    with pytest.raises(ValueError):
+        FinancialContext.from_bytes(bytes(blob))
@@ -0,0 +1,98 @@
+#population's CSV shards must count every line exactly once, wherever the byte ranges fall,
+#and agree with batch.py's per-profile pipeline
+import csv
+import random
+
+import pytest
+
+import batch
+import population
+
+INCOMES = ("1000000", "inf", "nan", "-5", "1e400", "abc", "", "750000.5", "2500000", "0")
+DEDUCTIONS = ("", "0", "150000", "-1", "x", "50000")
+AGES = ("", "30", "30.0", "0", "17", "101", "100", "18", " 45 ", "99999999999999999999999", "x")
+RISKS = ("", "low", "Medium", "HIGH", "bad")
+
+
+def write_profiles(path, rows, trailing_newline=True):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["income", "deductions", "age", "risk_tolerance"])
+        writer.writerows(rows)
+    if not trailing_newline:
+        with open(path, "rb+") as f:
+            f.truncate(f.seek(0, 2) - 1)
+    return path
+
+
+def reference_aggregate(path):
+    """The aggregate built from batch.run_pipeline's per-profile results."""
+    aggregate = population.empty_aggregate()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        results = list(batch.run_pipeline(batch.read_records(f, "csv")))
+    for result in results:
+        aggregate["profiles"] += 1
+        if "error" in result:
+            aggregate["invalid"] += 1
+            continue
+        regime = result["recommended_regime"]
+        aggregate["regimes"][regime] += 1
+        aggregate["brackets"][result["tax_bracket"]] += 1
+        aggregate["tax_sum"] += result["new_regime_tax" if regime == "New Regime" else "old_regime_tax"]
+        aggregate["savings_sum"] += abs(result["old_regime_tax"] - result["new_regime_tax"])
+        if result["risk_tolerance"]:
+            aggregate["risk"][result["risk_tolerance"]] += 1
+        if result["allocation"]:
+            aggregate["allocated"] += 1
+            for asset, share in result["allocation"].items():
+                aggregate["allocation_sum"][asset] += share
+    return aggregate
+
+
+def assert_same(got, expected):
+    for key in ("tax_sum", "savings_sum"):
+        assert got.pop(key) == pytest.approx(expected.pop(key))
+    assert got == expected
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    rng = random.Random(3)
+    rows = [[rng.choice(INCOMES), rng.choice(DEDUCTIONS), rng.choice(AGES), rng.choice(RISKS)] for _ in range(500)]
+    rows += [[str(rng.randint(0, 5_000_000)), str(rng.randint(0, 300_000)), str(rng.randint(18, 100)),
+              rng.choice(["low", "medium", "high"])] for _ in range(500)]
+    return write_profiles(tmp_path / "profiles.csv", rows)
+
+
+@pytest.mark.parametrize("shard_bytes", [1, 7, 64, 997, 7919, population.DEFAULT_SHARD_BYTES])
+@pytest.mark.parametrize("chunk_size", [1, population.DEFAULT_CHUNK_SIZE])
+def test_csv_shards_match_batch_pipeline(profiles, shard_bytes, chunk_size):
+    shards = population.csv_shards(profiles, shard_bytes=shard_bytes, chunk_size=chunk_size)
+    assert_same(population.run_shards(shards, workers=1), reference_aggregate(profiles))
+
+
+def test_shard_boundaries_on_line_starts(tmp_path):
+    # Every range starts exactly at the start of a line; that line belongs to this shard, not the previous one
+    rows = [[str(1000000 + i), "0", "30", "low"] for i in range(20)]
+    path = write_profiles(tmp_path / "profiles.csv", rows)
+    shards = population.csv_shards(path, shard_bytes=len("1000000,0,30,low\n"), chunk_size=1)
+    assert [population._csv_shard(*args)["profiles"] for _, args in shards] == [1] * 20
+    # A shard whose range starts mid-line leaves that line to the shard before it
+    _, (_, start, end, columns, year, chunk_size) = shards[0]
+    assert population._csv_shard(path, start + 1, end, columns, year, chunk_size)["profiles"] == 0
+
+
+def test_last_line_without_newline(tmp_path):
+    rows = [["1200000", "150000", "40", "high"], ["800000", "", "", ""], ["bad", "", "", ""]]
+    path = write_profiles(tmp_path / "profiles.csv", rows, trailing_newline=False)
+    for shard_bytes in (1, 5, 1000):
+        got = population.run_shards(population.csv_shards(path, shard_bytes=shard_bytes), workers=1)
+        assert_same(got, reference_aggregate(path))
+        assert got["profiles"] == 3 and got["invalid"] == 1
+
+
+def test_header_must_name_income(tmp_path):
+    path = tmp_path / "profiles.csv"
+    path.write_text("salary,age\n100,30\n")
+    with pytest.raises(ValueError):
+        population.csv_shards(path)
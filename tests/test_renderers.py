@@ -0,0 +1,72 @@
+#LineWrapper must wrap a stream exactly as textwrap wraps the whole text, wherever the chunks are split
+#(with whitespace runs collapsed, as LineWrapper documents), and prompts carry colors only on a terminal
+import io
+import json
+import random
+import textwrap
+
+import pytest
+
+from renderers import EventRenderer, LineWrapper, PlainRenderer, TTYRenderer, colors
+
+WORDS = ("tax", "regime", "ELSS", "PPF", "a", "index", "funds", "₹1,50,000", "diversification",
+         "supercalifragilisticexpialidocious" * 2)
+
+
+def wrap_stream(chunks, width):
+    wrapper = LineWrapper(width)
+    lines = []
+    for chunk in chunks:
+        lines.extend(wrapper.feed(chunk))
+    return lines + wrapper.flush()
+
+
+def random_text(rng):
+    separators = (" ", " ", " ", "  ", "\n", " \n ")
+    words = [rng.choice(WORDS) for _ in range(rng.randint(0, 60))]
+    return rng.choice(("", " ")) + "".join(w + rng.choice(separators) for w in words)[:-1 or None]
+
+
+def random_split(text, rng):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 12))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("width", [1, 5, 12, 40, 80])
+def test_matches_textwrap_for_any_chunking(width):
+    rng = random.Random(width)
+    for _ in range(300):
+        text = random_text(rng)
+        # textwrap leaves a trailing space on a full line that precedes an over-long word; LineWrapper does not
+        expected = [line.rstrip() for line in textwrap.wrap(" ".join(text.split()), width, break_on_hyphens=False)]
+        assert wrap_stream(random_split(text, rng), width) == expected, text
+        assert wrap_stream([text], width) == expected
+        assert wrap_stream(list(text), width) == expected
+
+
+def test_words_are_never_split_at_chunk_boundaries():
+    assert wrap_stream(["Index fu", "nds and E", "LSS"], 80) == ["Index funds and ELSS"]
+
+
+def test_width_must_be_positive():
+    with pytest.raises(ValueError):
+        LineWrapper(0)
+
+
+@pytest.mark.parametrize("renderer, shown", [
+    (PlainRenderer, "> Your age? "),
+    (TTYRenderer, f"{colors.YELLOW}> Your {colors.BOLD}age{colors.ENDC}? {colors.ENDC}"),
+])
+def test_prompt_is_colored_only_for_a_terminal(monkeypatch, renderer, shown):
+    monkeypatch.setattr("sys.stdin", io.StringIO("42\n"))
+    out = io.StringIO()
+    assert renderer(stream=out).prompt(f"Your {colors.BOLD}age{colors.ENDC}? ") == "42"
+    assert out.getvalue() == shown
+
+
+def test_event_renderer_emits_prompt_events(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("y\n"))
+    out = io.StringIO()
+    assert EventRenderer(stream=out).prompt(f"\n{colors.YELLOW}Reuse these details?{colors.ENDC} ") == "y"
+    event = json.loads(out.getvalue())
+    assert event["type"] == "prompt" and event["text"] == "Reuse these details?"
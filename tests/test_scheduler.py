@@ -0,0 +1,142 @@
+#Scheduler against FakeModel: merging of identical prompts, 429 retries, queue overflow and the token bucket
+import random
+import threading
+import time
+
+import pytest
+
+from fake_model import FakeModel, RateLimitError
+from model_pool import ModelPool
+from scheduler import Scheduler, SchedulerBusy, TokenBucket
+
+
+class Clock:
+    """A manual clock; sleep() advances it instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def fake_pool(models, size=2, **kwargs):
+    def factory(name):
+        model = FakeModel(name, **kwargs)
+        models.append(model)
+        return model
+    return ModelPool("fake", size=size, factory=factory)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def test_token_bucket_allows_bursts_then_the_rate():
+    clock = Clock()
+    bucket = TokenBucket(2.0, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.acquire() == pytest.approx(0.5)
+    clock.now += 1.0
+    assert bucket.try_acquire() and bucket.try_acquire() and not bucket.try_acquire()
+    with pytest.raises(TimeoutError):
+        bucket.acquire(timeout=0.1)
+
+
+def test_identical_concurrent_prompts_share_one_call():
+    models = []
+    scheduler = Scheduler("fake", pool=fake_pool(models, latency=0.3))
+    results = [None] * 5
+
+    def call(i):
+        results[i] = scheduler.generate("same prompt").text
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1 and results[0].endswith("same prompt")
+    assert sum(model.calls for model in models) == 1
+    stats = scheduler.stats()
+    assert stats["submitted"] == 5 and stats["merged"] == 4 and stats["completed"] == 1
+    # Once the call has finished the prompt is not merged any more
+    scheduler.generate("same prompt")
+    assert sum(model.calls for model in models) == 2
+
+
+def test_rate_limited_calls_are_retried_until_the_quota_allows_them():
+    clock = Clock()
+    quota = TokenBucket(1.0, burst=1, clock=clock)
+    models = []
+    scheduler = Scheduler("fake", pool=fake_pool(models, quota=quota), max_retries=20, base_delay=0.5,
+                          sleep=clock.sleep, rng=random.Random(0))
+    assert scheduler.generate("first").text.endswith("first")
+    assert scheduler.generate("second").text.endswith("second")  # the quota is empty until a second has passed
+    stats = scheduler.stats()
+    assert stats["retries"] >= 1 and stats["rate_limited"] == stats["retries"]
+    assert stats["completed"] == 2 and stats["failed"] == 0
+    assert sum(model.rate_limited for model in models) == stats["rate_limited"]
+    assert clock.now >= 1.0
+
+
+def test_retries_give_up_after_max_retries_and_honour_retry_after():
+    class AlwaysLimited:
+        def try_acquire(self):
+            return False
+
+    clock = Clock()
+    scheduler = Scheduler("fake", pool=fake_pool([], quota=AlwaysLimited()), max_retries=2, sleep=clock.sleep)
+    with pytest.raises(RateLimitError):
+        scheduler.generate("prompt")
+    stats = scheduler.stats()
+    assert stats["retries"] == 2 and stats["rate_limited"] == 3 and stats["failed"] == 1
+    assert all(delay <= scheduler.base_delay * 2 for delay in clock.slept)
+    assert scheduler.backoff(0, RateLimitError(retry_after=7.0)) == 7.0
+
+
+def test_errors_that_are_not_retryable_fail_at_once():
+    class Broken(FakeModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            raise ValueError("bad request")
+
+    clock = Clock()
+    scheduler = Scheduler("fake", pool=ModelPool("fake", size=1, factory=Broken), sleep=clock.sleep)
+    with pytest.raises(ValueError):
+        scheduler.generate("prompt")
+    assert scheduler.stats()["retries"] == 0 and clock.slept == []
+
+
+def test_calls_beyond_the_queue_are_rejected():
+    scheduler = Scheduler("fake", pool=fake_pool([], size=1, latency=0.5), max_concurrency=1, max_queue=1)
+    threads = [threading.Thread(target=scheduler.generate, args=(f"prompt {i}",)) for i in range(2)]
+    threads[0].start()
+    wait_for(lambda: scheduler.stats()["running"] == 1)
+    threads[1].start()
+    wait_for(lambda: scheduler.stats()["queue_depth"] == 1)
+    with pytest.raises(SchedulerBusy):
+        scheduler.generate("one too many")
+    for thread in threads:
+        thread.join()
+    stats = scheduler.stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 2 and stats["max_queue_depth"] == 1
+
+
+def test_streams_are_retried_before_the_first_chunk():
+    clock = Clock()
+    quota = TokenBucket(1.0, burst=1, clock=clock)
+    quota.try_acquire()
+    scheduler = Scheduler("fake", pool=fake_pool([], quota=quota, chunk_words=2), max_retries=20,
+                          sleep=clock.sleep, rng=random.Random(0))
+    text = "".join(scheduler.stream("a streamed prompt"))
+    assert text.endswith("a streamed prompt")
+    assert scheduler.stats()["retries"] >= 1
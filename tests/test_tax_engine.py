@@ -0,0 +1,110 @@
+#the scalar and batch tax paths must agree exactly: with the original FY 2024-25 if/elif formulas,
+#and with each other for every year in tax_rules.json
+import numpy as np
+import pytest
+
+from tax_engine import NEW_REGIME, OLD_REGIME, compute_tax, compute_tax_batch, get_tax_rules, tax_years
+
+FIELDS = ("taxable_old", "taxable_new", "old_regime_tax", "new_regime_tax",
+          "rebate_old", "rebate_new", "tax_bracket", "recommended_regime")
+
+
+def original_tax(income, deductions):
+    """The FY 2024-25 logic the Taxwell agents used before the engine existed."""
+    taxable_old = max(0, income - deductions)
+    tax_old = 0
+    if taxable_old > 1000000:
+        tax_old = 112500 + (taxable_old - 1000000) * 0.30
+    elif taxable_old > 500000:
+        tax_old = 12500 + (taxable_old - 500000) * 0.20
+    elif taxable_old > 250000:
+        tax_old = (taxable_old - 250000) * 0.05
+    old_regime_tax = round(tax_old * 1.04)
+    rebate_old = 0
+    if taxable_old <= 500000:
+        old_regime_tax, rebate_old = 0, old_regime_tax
+
+    taxable_new = income
+    tax_new = 0
+    if taxable_new > 1500000:
+        tax_new = 150000 + (taxable_new - 1500000) * 0.30
+    elif taxable_new > 1200000:
+        tax_new = 90000 + (taxable_new - 1200000) * 0.20
+    elif taxable_new > 900000:
+        tax_new = 45000 + (taxable_new - 900000) * 0.15
+    elif taxable_new > 600000:
+        tax_new = 15000 + (taxable_new - 600000) * 0.10
+    elif taxable_new > 300000:
+        tax_new = (taxable_new - 300000) * 0.05
+    new_regime_tax = round(tax_new * 1.04)
+    rebate_new = 0
+    if taxable_new <= 700000:
+        new_regime_tax, rebate_new = 0, new_regime_tax
+
+    if new_regime_tax < old_regime_tax:
+        regime = NEW_REGIME
+        bracket = "30%" if taxable_new > 1500000 else "20%" if taxable_new > 1200000 else "15% or less"
+    else:
+        regime = OLD_REGIME
+        bracket = "30%" if taxable_old > 1000000 else "20%" if taxable_old > 500000 else "5% or less"
+    return {
+        "taxable_old": taxable_old,
+        "taxable_new": taxable_new,
+        "old_regime_tax": old_regime_tax,
+        "new_regime_tax": new_regime_tax,
+        "rebate_old": rebate_old,
+        "rebate_new": rebate_new,
+        "tax_bracket": bracket,
+        "recommended_regime": regime,
+    }
+
+
+def _around(points):
+    return sorted({max(0.0, p + d) for p in points for d in (-1, -0.01, 0, 0.01, 1)})
+
+
+def boundary_profiles(year):
+    """Income/deduction pairs straddling every slab, surcharge, relief and rebate breakpoint of a year."""
+    rules = get_tax_rules(year)
+    old_points = [s + rules.old.standard_deduction for s in rules.old.starts + (rules.old.rebate_limit,)]
+    new_points = [s + rules.new.standard_deduction for s in rules.new.starts + (rules.new.rebate_limit,)]
+    incomes = _around(old_points + new_points) + [2e6, 5e6, 1e7, 5e7, 1e8]
+    income = np.array([i for i in incomes for _ in range(3)])
+    deductions = np.array([d for _ in incomes for d in (0.0, 150000.0, 500000.0)])
+    # Deductions that land the old-regime taxable amount exactly on each breakpoint
+    exact = np.array(_around(old_points))
+    return np.concatenate([income, exact + 200000]), np.concatenate([deductions, np.full(len(exact), 200000.0)])
+
+
+def random_profiles(count, seed=0):
+    rng = np.random.default_rng(seed)
+    income = np.round(rng.lognormal(np.log(900000), 1.0, count), 2)
+    deductions = np.round(rng.uniform(0, 0.4, count) * income, 2)
+    # Whole-rupee amounts hit the breakpoints far more often than paise do
+    income[::3] = np.round(income[::3], -4)
+    return income, deductions
+
+
+def assert_batch_matches(rows, batch):
+    for i, expected in enumerate(rows):
+        for field in FIELDS:
+            assert batch[field][i].item() == expected[field], (field, expected)
+
+
+@pytest.mark.parametrize("profiles", [boundary_profiles("FY2024-25"), random_profiles(20000)], ids=["boundaries", "random"])
+def test_fy2024_25_matches_original_formulas(profiles):
+    income, deductions = profiles
+    expected = [original_tax(i, d) for i, d in zip(income.tolist(), deductions.tolist())]
+    scalar = [compute_tax(i, d, year="FY2024-25") for i, d in zip(income.tolist(), deductions.tolist())]
+    assert [{f: row[f] for f in FIELDS} for row in scalar] == expected
+    assert_batch_matches(expected, compute_tax_batch(income, deductions, year="FY2024-25"))
+
+
+@pytest.mark.parametrize("year", tax_years())
+def test_batch_matches_scalar(year):
+    boundary_income, boundary_deductions = boundary_profiles(year)
+    random_income, random_deductions = random_profiles(20000, seed=1)
+    income = np.concatenate([boundary_income, random_income])
+    deductions = np.concatenate([boundary_deductions, random_deductions])
+    scalar = [compute_tax(i, d, year=year) for i, d in zip(income.tolist(), deductions.tolist())]
+    assert_batch_matches(scalar, compute_tax_batch(income, deductions, year=year))
@@ -0,0 +1,243 @@
+#lightweight tracing for agent steps, model calls and rendering
+#enable with FINLEY_TRACE=<path>: every finished span is appended to that JSON-lines file
+#usage: python tracing.py trace.jsonl [--json]   (per-stage latency histogram of a trace file)
+import argparse
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_span = contextvars.ContextVar("finley_current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed stage. Attributes can be added while it runs with set()."""
+    __slots__ = ("tracer", "name", "span_id", "parent_id", "attrs", "start", "duration", "_started", "_token")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.attrs = attrs
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass  # exited from another context, e.g. a generator resumed on a different thread
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration * 1000,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a Span when tracing is off, so instrumented code costs almost nothing."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class StageStats:
+    """Constant-memory latency summary of one stage: count, total, max and a bucketed histogram."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th quantile (the max for the open-ended bucket)."""
+        target = p * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "histogram": {
+                (f"<={bound}ms" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}ms"): count
+                for i, (bound, count) in enumerate(zip(BUCKETS_MS + (None,), self.buckets)) if count
+            },
+        }
+
+
+class Tracer:
+    """Collects finished spans into per-stage statistics and, given a path, a JSON-lines trace file."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._stages = {}
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def record(self, span):
+        line = json.dumps(span.to_dict(), default=str) + "\n" if self._file is not None else None
+        with self._lock:
+            stats = self._stages.get(span.name)
+            if stats is None:
+                stats = self._stages[span.name] = StageStats()
+            stats.add(span.duration * 1000)
+            if line is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    def summary(self):
+        """Per-stage latency statistics and histograms, keyed by span name."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stages.items())}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer = None
+_tracer_configured = False
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Returns the process-wide tracer (None when tracing is off), configured from FINLEY_TRACE on first use."""
+    global _tracer, _tracer_configured
+    if not _tracer_configured:
+        with _tracer_lock:
+            if not _tracer_configured:
+                path = os.getenv("FINLEY_TRACE")
+                _tracer = Tracer(path) if path else None
+                _tracer_configured = True
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Replaces the process-wide tracer (None turns tracing off) and returns the previous one."""
+    global _tracer, _tracer_configured
+    with _tracer_lock:
+        previous, _tracer = _tracer, tracer
+        _tracer_configured = True
+    return previous
+
+
+def span(name, **attrs):
+    """Times the enclosed block as stage `name`; a shared no-op when tracing is off.
+
+        with span("model.call", model=MODEL_NAME) as s:
+            ...
+            s.set(prompt_tokens=n)
+    """
+    tracer = _tracer if _tracer_configured else get_tracer()
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.span(name, **attrs)
+
+
+def token_counts(prompt, response=None):
+    """Prompt/response token counts, from the response's usage metadata when the backend reports it.
+
+    Otherwise they are estimated at four characters per token and flagged as such.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+        return {"prompt_tokens": usage.prompt_token_count, "response_tokens": usage.candidates_token_count or 0}
+    text = getattr(response, "text", response) or ""
+    return {"prompt_tokens": len(prompt) // 4 + 1, "response_tokens": len(text) // 4, "tokens_estimated": True}
+
+
+def summarize_file(path):
+    """Rebuilds the per-stage summary from a JSON-lines trace file."""
+    stages = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                stages.setdefault(record["name"], StageStats()).add(record["duration_ms"])
+    return {name: stats.to_dict() for name, stats in sorted(stages.items())}
+
+
+def format_summary(summary, width=30):
+    """Renders a summary as a text table with one histogram bar chart per stage."""
+    lines = [f"{'stage':<22}{'count':>8}{'avg ms':>11}{'p50 ms':>11}{'p99 ms':>11}{'max ms':>11}"]
+    for name, stats in summary.items():
+        lines.append(f"{name:<22}{stats['count']:>8}{stats['avg_ms']:>11.2f}{stats['p50_ms']:>11.2f}"
+                     f"{stats['p99_ms']:>11.2f}{stats['max_ms']:>11.2f}")
+        peak = max(stats["histogram"].values(), default=0)
+        for bucket, count in stats["histogram"].items():
+            lines.append(f"    {bucket:>10} {'#' * max(1, round(width * count / peak)):<{width}} {count}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a Finley trace file as per-stage latency histograms.")
+    parser.add_argument("trace", help="JSON-lines file written with FINLEY_TRACE")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+    summary = summarize_file(args.trace)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()